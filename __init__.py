@@ -1,7 +1,15 @@
 import bpy, mathutils
 from bpy.utils import register_class, unregister_class
 from math import radians
+import hashlib
+import importlib.util
+import json
+import os
 import re
+import time
+import traceback
+import numpy as np
+from .export_manifest import readExportManifest, writeExportManifest
 
 # info about add on
 bl_info = {
@@ -15,6 +23,330 @@ bl_info = {
 }
 
 
+# Fields copied from each driver variable target
+driverTargetFields = [
+    "bone_target",
+    "data_path",
+    "id",
+    "rotation_mode",
+    "transform_space",
+    "transform_type",
+]
+
+
+# Blender evaluates drivers with simple expressions natively, anything else goes through Python every update.
+# These rewrites only match forms where the result is exactly equivalent.
+# "var * 4 if var > 0 else 0" -> "max(var * 4, 0)", "-var * 4 if var < 0 else 0" -> "max(-var * 4, 0)"
+clampExpressionPattern = re.compile(
+    r"^\s*(?P<value>(?P<sign>-?)\s*(?P<var>[A-Za-z_]\w*)\s*\*\s*\d+(?:\.\d*)?)"
+    r"\s+if\s+(?P=var)\s*(?P<op>[<>])\s*0(?:\.0*)?\s+else\s+0(?:\.0*)?\s*$"
+)
+# "math.sin(var)" -> "sin(var)", attribute access is not allowed in simple expressions
+mathPrefixPattern = re.compile(
+    r"\bmath\.(sin|cos|tan|asin|acos|atan|atan2|exp|log|sqrt|pow|fmod|floor|ceil|trunc|radians|degrees|pi)\b"
+)
+
+
+def simplifyDriverExpression(expression):
+    expression = mathPrefixPattern.sub(r"\1", expression)
+    match = clampExpressionPattern.match(expression)
+    if match and (match.group("sign") == "-") == (match.group("op") == "<"):
+        expression = f"max({match.group('value')}, 0)"
+    return expression
+
+
+# Named, sequential stage timings. Starting a stage ends the previous one.
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+        self.stage = None
+        self.stageStart = 0
+
+    def start(self, stage):
+        self.stop()
+        self.stage = stage
+        self.stageStart = time.perf_counter()
+
+    def stop(self):
+        if self.stage:
+            self.timings[self.stage] = self.timings.get(self.stage, 0) + time.perf_counter() - self.stageStart
+            self.stage = None
+
+    def summary(self):
+        return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+
+
+# Select exactly objs. Only touches currently selected objects, unlike select_all which visits every object in the scene.
+def setSelection(objs, active):
+    for obj in bpy.context.selected_objects:
+        if obj not in objs:
+            obj.select_set(False)
+    for obj in objs:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = active
+
+
+# Generation tracking. Objects and armatures made by GenerateRig are tagged with the metarig they came from and
+# that metarig's generation number, so the leftovers of earlier runs can be found and removed.
+def tagGeneration(idDatas, metarigObj, generationId):
+    for idData in idDatas:
+        idData["grt_metarig"] = metarigObj.name
+        idData["grt_generation_id"] = generationId
+
+
+# Tagged datablocks whose generation is not the current one of their metarig (or whose metarig is gone).
+# Limited to the given metarig names if there are any.
+def getStaleGenerationData(metarigNames=None):
+    metarigNames = set(metarigNames) if metarigNames is not None else None
+    stale = []
+    for idData in list(bpy.data.objects) + list(bpy.data.armatures):
+        owner = idData.get("grt_metarig")
+        if owner is None or (metarigNames is not None and owner not in metarigNames):
+            continue
+        metarigObj = bpy.data.objects.get(owner)
+        currentId = metarigObj.get("grt_generation_id") if metarigObj else None
+        if idData.get("grt_generation_id") != currentId:
+            stale.append(idData)
+    return stale
+
+
+# Rough estimate of the in-memory size from approximate sizes of Blender's bone, pose channel and object structs.
+# Only meant to give an idea of scale in reports, not a measurement.
+def estimateDataSize(idData):
+    if isinstance(idData, bpy.types.Armature):
+        return 512 * len(idData.bones)
+    if isinstance(idData, bpy.types.Object):
+        return 1024 + (800 * len(idData.pose.bones) if idData.pose else 0)
+    return 0
+
+
+# Removes stale generated datablocks that nothing but collections and scenes use anymore.
+# Scans the whole file once, however many metarigs are given. Returns counts per type and a rough size estimate.
+def purgeGenerationData(metarigNames=None):
+    stale = getStaleGenerationData(metarigNames)
+    freed = {"objects": 0, "armatures": 0, "estimated_bytes": 0}
+
+    staleObjs = [idData for idData in stale if isinstance(idData, bpy.types.Object)]
+    userMap = bpy.data.user_map(subset=staleObjs)
+    for obj in staleObjs:
+        if any(not isinstance(user, (bpy.types.Collection, bpy.types.Scene)) for user in userMap[obj]):
+            continue
+        freed["estimated_bytes"] += estimateDataSize(obj)
+        bpy.data.objects.remove(obj)
+        freed["objects"] += 1
+
+    # Removing the objects orphans their armatures, and joins can leave orphaned copies behind
+    for armature in [idData for idData in stale if isinstance(idData, bpy.types.Armature)]:
+        if armature.users == 0:
+            freed["estimated_bytes"] += estimateDataSize(armature)
+            bpy.data.armatures.remove(armature)
+            freed["armatures"] += 1
+    return freed
+
+
+class DriverVariableInfo:
+    def __init__(self, name, type, targets):
+        self.name = name
+        self.type = type
+        self.targets = targets  # one {field: value} dict per driver target
+
+
+class ShapeKeyDriverInfo:
+    def __init__(self, shapeKeyName, type, expression, variables):
+        self.shapeKeyName = shapeKeyName
+        self.type = type
+        self.expression = expression
+        self.variables = variables
+
+    # With simplify, the expression is rewritten for the simple expression evaluator. Existing drivers are read
+    # without it when fingerprinted, so a slow expression never matches its rewritten form.
+    @staticmethod
+    def fromDriver(shapeKeyName, driver, targetId=None, simplify=False):
+        variables = []
+        for driverVar in driver.variables:
+            targets = []
+            for target in driverVar.targets:
+                targetInfo = {field: getattr(target, field) for field in driverTargetFields}
+                if targetId:
+                    targetInfo["id"] = targetId
+                targets.append(targetInfo)
+            variables.append(DriverVariableInfo(driverVar.name, driverVar.type, targets))
+        expression = simplifyDriverExpression(driver.expression) if simplify else driver.expression
+        return ShapeKeyDriverInfo(shapeKeyName, driver.type, expression, variables)
+
+    # Compared against the fingerprint of an existing driver to decide whether it needs rewriting
+    def fingerprint(self):
+        return (
+            self.type,
+            self.expression,
+            tuple(
+                (variableInfo.name, variableInfo.type, tuple(tuple(targetInfo.items()) for targetInfo in variableInfo.targets))
+                for variableInfo in self.variables
+            ),
+        )
+
+    # https://docs.blender.org/api/current/bpy.types.Driver.html
+    def apply(self, keyBlock):
+        driver = keyBlock.driver_add("value").driver
+        driver.type = self.type
+        driver.expression = self.expression
+
+        # driver_add() returns the existing driver if there is one, so clear out its old variables
+        for driverVar in list(driver.variables):
+            driver.variables.remove(driverVar)
+
+        for variableInfo in self.variables:
+            driverVar = driver.variables.new()
+            driverVar.name = variableInfo.name
+            driverVar.type = variableInfo.type
+            for target, targetInfo in zip(driverVar.targets, variableInfo.targets):
+                for field, value in targetInfo.items():
+                    setattr(target, field, value)
+
+        # Need to do this to force update of driver
+        driver.expression = driver.expression
+        return driver
+
+
+# Shape key driver presets, loaded from the .json and .py files in presets/.
+# A JSON file holds one preset, a Python file defines a PRESETS list of the same dicts:
+#
+#     {
+#         "name": "Eye",
+#         "description": "...",
+#         "order": 1,                   # position in the panel enum
+#         "bones": "active",            # "each": drivers for every selected bone, "active": for one bone only
+#         "drivers": [
+#             # shape_key may use {bone} for the bone name, and has to with "each" so no two drivers share a shape key.
+#             # "range" maps the channel value at its start/end to a
+#             # shape key value of 0/1, "clamp" keeps it from going below 0. "expression" in terms of var replaces both.
+#             {"shape_key": "LookUp", "channel": "LOC_Y", "space": "LOCAL_SPACE", "range": [0, 0.25], "clamp": true}
+#         ]
+#     }
+presetDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets")
+
+
+# Shortest text that reads back as the same float, without a trailing ".0" for whole numbers
+def formatExpressionNumber(value):
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+# Linear map of [start, end] to [0, 1], written so Blender can use its simple expression evaluator
+def compileRangeExpression(start, end, clamp):
+    if start == end:
+        raise RuntimeError(f"Preset range [{start}, {end}] is empty.")
+    scale = 1 / (end - start)
+    variable = f"(var - {formatExpressionNumber(start)})" if start else "var"
+    if scale < 0:
+        expression = f"-{variable} * {formatExpressionNumber(-scale)}"
+    else:
+        expression = f"{variable} * {formatExpressionNumber(scale)}"
+    return f"max({expression}, 0)" if clamp else expression
+
+
+class DriverPreset:
+    def __init__(self, name, description, order, boneMode, templates):
+        self.name = name
+        self.description = description
+        self.order = order
+        self.boneMode = boneMode
+        self.templates = templates  # (shape key name format, expression, transform type, transform space)
+
+    # Validates a preset dict and compiles its expressions once
+    @staticmethod
+    def fromDict(data):
+        boneMode = data.get("bones", "each")
+        if boneMode not in ("each", "active"):
+            raise RuntimeError(f'Preset {data.get("name")}: "bones" must be "each" or "active".')
+        templates = []
+        shapeKeyNames = set()
+        for driver in data["drivers"]:
+            # Each driver must land on its own shape key, otherwise later bindings overwrite earlier ones
+            shapeKeyName = driver["shape_key"]
+            if boneMode == "each" and "{bone}" not in shapeKeyName:
+                raise RuntimeError(
+                    f'Preset {data.get("name")}: shape key "{shapeKeyName}" needs {{bone}} when "bones" is "each".'
+                )
+            if shapeKeyName in shapeKeyNames:
+                raise RuntimeError(f'Preset {data.get("name")}: shape key "{shapeKeyName}" is driven twice.')
+            shapeKeyNames.add(shapeKeyName)
+
+            if "expression" in driver:
+                expression = driver["expression"]
+            else:
+                expression = compileRangeExpression(*driver["range"], driver.get("clamp", False))
+            templates.append(
+                (driver["shape_key"], expression, driver["channel"], driver.get("space", "LOCAL_SPACE"))
+            )
+        return DriverPreset(data["name"], data.get("description", ""), data.get("order", 100), boneMode, templates)
+
+    def getBindings(self, rigObj, selectedBones, activeBone):
+        if self.boneMode == "active":
+            # All shape keys are driven by one bone, prefer the active one
+            if not selectedBones:
+                return []
+            selectedBones = [activeBone if activeBone in selectedBones else selectedBones[0]]
+
+        # https://blender.stackexchange.com/questions/282140/how-can-i-add-and-configure-a-driver-through-a-script
+        # https://docs.blender.org/api/current/bpy.types.DriverVariable.html
+        # https://docs.blender.org/api/current/bpy.types.DriverTarget.html
+        bindings = []
+        for bone in selectedBones:
+            for shapeKeyName, expression, transformType, transformSpace in self.templates:
+                target = {
+                    "id": rigObj,
+                    "bone_target": bone.name,
+                    "transform_type": transformType,
+                    "transform_space": transformSpace,
+                }
+                bindings.append(
+                    ShapeKeyDriverInfo(
+                        shapeKeyName.format(bone=bone.name),
+                        "SCRIPTED",
+                        expression,
+                        [DriverVariableInfo("var", "TRANSFORMS", [target])],
+                    )
+                )
+        return bindings
+
+
+# Preset name -> DriverPreset
+driverPresets = {}
+
+
+def readPresetFile(path):
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as presetFile:
+            return [json.load(presetFile)]
+    spec = importlib.util.spec_from_file_location(f"grt_preset_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return list(module.PRESETS)
+
+
+# (Re)loads every preset file. A broken file is skipped and its error returned, so it cannot stop the add-on loading.
+def loadDriverPresets(directory=presetDirectory):
+    presets = {}
+    errors = []
+    for fileName in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if not fileName.endswith((".json", ".py")) or fileName.startswith("_"):
+            continue
+        try:
+            for data in readPresetFile(os.path.join(directory, fileName)):
+                preset = DriverPreset.fromDict(data)
+                presets[preset.name] = preset
+        except Exception as e:
+            errors.append(f"{fileName}: {type(e).__name__}: {e}")
+            print(f"Could not load driver preset {errors[-1]}")
+
+    driverPresets.clear()
+    driverPresets.update(sorted(presets.items(), key=lambda item: (item[1].order, item[0])))
+    # Blender only keeps pointers to enum item strings, so the list has to stay referenced
+    ShapeKeySetupTypes[:] = [(preset.name, preset.name, preset.description) for preset in driverPresets.values()]
+    return errors
+
+
 class SetupShapekeyDriver(bpy.types.Operator):
     # set bl_ properties
     bl_description = "Given the selected deform pose bones, set up a driver on the shape key with the same name as the bone, based on a preset category."
@@ -33,89 +365,56 @@ class SetupShapekeyDriver(bpy.types.Operator):
         if context.mode != "POSE":
             bpy.ops.object.mode_set(mode="POSE")
 
-        shapeKeyType = bpy.context.scene.shapeKeySetupProperty.shapeKeyType
-        for bone in bpy.context.selected_pose_bones:
-            for obj in [n for n in rigObj.children if n.type == "MESH"]:
-                if (
-                    shapeKeyType == "Single"
-                    and obj.data.shape_keys
-                    and bone.name in obj.data.shape_keys.key_blocks
-                ):
-                    # https://blender.stackexchange.com/questions/282140/how-can-i-add-and-configure-a-driver-through-a-script
-                    # https://docs.blender.org/api/current/bpy.types.Driver.html
-                    driver = (
-                        obj.data.shape_keys.key_blocks[bone.name]
-                        .driver_add("value")
-                        .driver
-                    )
-                    driver.type = "SCRIPTED"
-                    # driver.expression = "-var * 4 if var < 0 else 0"
-
-                    var = (
-                        driver.variables.new()
-                    )  # https://docs.blender.org/api/current/bpy.types.DriverVariable.html
-                    var.type = "TRANSFORMS"
-                    var.name = "var"
-                    target = var.targets[
-                        0
-                    ]  # https://docs.blender.org/api/current/bpy.types.DriverTarget.html
-                    target.id = rigObj
-                    target.bone_target = bone.name
-
-                    # bone going from 0-0.5 in local Y -> 0-1 shape key value
-                    if shapeKeyType == "Single":
-                        driver.expression = "var * 2"
-                        target.transform_type = "LOC_Y"
-                        target.transform_space = "LOCAL_SPACE"
-
-                elif shapeKeyType == "Eye" and obj.data.shape_keys:
-                    shapeKeyNames = ["LookUp", "LookDown", "LookLeft", "LookRight"]
-                    for shapeKey in [
-                        n for n in shapeKeyNames if n in obj.data.shape_keys.key_blocks
-                    ]:
-                        # https://blender.stackexchange.com/questions/282140/how-can-i-add-and-configure-a-driver-through-a-script
-                        # https://docs.blender.org/api/current/bpy.types.Driver.html
-                        driver = (
-                            obj.data.shape_keys.key_blocks[shapeKey]
-                            .driver_add("value")
-                            .driver
-                        )
-                        driver.type = "SCRIPTED"
-                        # driver.expression = "-var * 4 if var < 0 else 0"
-
-                        var = (
-                            driver.variables.new()
-                        )  # https://docs.blender.org/api/current/bpy.types.DriverVariable.html
-                        var.type = "TRANSFORMS"
-                        var.name = "var"
-                        target = var.targets[
-                            0
-                        ]  # https://docs.blender.org/api/current/bpy.types.DriverTarget.html
-                        target.id = rigObj
-                        target.bone_target = bone.name
-
-                        # bone going from -0.25-0.25 in local XY -> 0-1 shape key value
-                        if shapeKey == "LookUp":
-                            driver.expression = "var * 4 if var > 0 else 0"
-                            target.transform_type = "LOC_Y"
-                        elif shapeKey == "LookDown":
-                            driver.expression = "-var * 4 if var < 0 else 0"
-                            target.transform_type = "LOC_Y"
-                        elif shapeKey == "LookLeft":
-                            driver.expression = "-var * 4 if var < 0 else 0"
-                            target.transform_type = "LOC_X"
-                        elif shapeKey == "LookRight":
-                            driver.expression = "var * 4 if var > 0 else 0"
-                            target.transform_type = "LOC_X"
-                        target.transform_space = "LOCAL_SPACE"
-
-        self.report({"INFO"}, "Finished")
+        prop = bpy.context.scene.shapeKeySetupProperty
+        start = time.perf_counter()
+
+        activeBone = bpy.context.active_pose_bone
+        driverCount, shapeKeyCount = setupShapeKeyDrivers(
+            rigObj,
+            [poseBone.name for poseBone in bpy.context.selected_pose_bones or []],
+            prop.shapeKeyType,
+            activeBone.name if activeBone else None,
+            prop.searchAllSkinnedMeshes,
+            context.scene,
+        )
+
+        message = f"Set up {driverCount} drivers ({shapeKeyCount} shape keys) in {time.perf_counter() - start:.2f}s"
+        print(message)
+        self.report({"INFO"}, message)
         return {"FINISHED"}
 
+    # Shape key name -> [(mesh object, key block)] for every mesh deformed by the rig
+    @staticmethod
+    def buildShapeKeyIndex(rigObj, scene, searchAllSkinnedMeshes):
+        meshObjs = [obj for obj in rigObj.children if obj.type == "MESH"]
+        if searchAllSkinnedMeshes:
+            meshObjs += [
+                obj
+                for obj in scene.objects
+                if obj.type == "MESH"
+                and obj.parent != rigObj
+                and any(mod.type == "ARMATURE" and mod.object == rigObj for mod in obj.modifiers)
+            ]
+
+        shapeKeyIndex = {}
+        for obj in meshObjs:
+            if not obj.data.shape_keys:
+                continue
+            for keyBlock in obj.data.shape_keys.key_blocks:
+                shapeKeyIndex.setdefault(keyBlock.name, []).append((obj, keyBlock))
+        return shapeKeyIndex
+
+    @staticmethod
+    def getBindings(rigObj, shapeKeyType, selectedBones, activeBone):
+        preset = driverPresets.get(shapeKeyType)
+        if preset is None:
+            raise RuntimeError(f"Unknown shape key preset {shapeKeyType}.")
+        return preset.getBindings(rigObj, selectedBones, activeBone)
+
 
 class UpdateArmatureReferences(bpy.types.Operator):
     # set bl_ properties
-    bl_description = 'Updates armature modifiers on meshes to point to a new armature.'
+    bl_description = 'Updates armature modifiers on meshes to point to a new armature. With an old armature set, every modifier, constraint and parent that uses it in the chosen scope is rebound to the active armature.'
     bl_idname = "object.update_armature_refs"
     bl_label = "Update Armature Modifiers"
     bl_options = {"REGISTER", "UNDO", "PRESET"}
@@ -128,24 +427,72 @@ class UpdateArmatureReferences(bpy.types.Operator):
 
         # Get the active object (should be the armature)
         active_obj = bpy.context.active_object
-        for obj in bpy.context.selected_objects:
-            # Skip the active object itself
-            if obj == active_obj:
-                continue
-            
-            # Search for an armature modifier on the object
+        prop = context.scene.rigifyToGRTProperty
+        oldRig = prop.rebindOldRig
+
+        if oldRig is None and prop.rebindScope != "Selected":
+            self.report({"ERROR"}, "Set the old armature to rebind the whole scene or file.")
+            return {"FINISHED"}
+
+        if prop.rebindScope == "Selected":
+            objs = bpy.context.selected_objects
+        elif prop.rebindScope == "Scene":
+            objs = context.scene.objects
+        else:
+            objs = bpy.data.objects
+
+        start = time.perf_counter()
+        users = rebindArmatures(active_obj, objs, oldRig, prop.rebindDryRun)
+        if oldRig is None:
+            self.report({"INFO"}, "Finished")
+            return {"FINISHED"}  # must return a set
+
+        self.report(
+            {"INFO"},
+            f"{'Found' if prop.rebindDryRun else 'Rebound'} {len(users)} references to {oldRig.name} "
+            f"on {len({obj for obj, kind, item in users})} objects in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    # Armature object -> [(owner object, kind, item)] for every modifier, constraint and parent in one pass
+    @staticmethod
+    def buildArmatureIndex(objs):
+        index = {}
+        for obj in objs:
             for mod in obj.modifiers:
-                if mod.type == 'ARMATURE':
-                    print(f"Updating armature modifier for: {obj.name}")
-                    mod.object = active_obj
-                    break  # Only update the first armature modifier
-        
-        self.report({"INFO"}, "Finished")
-        return {"FINISHED"}  # must return a set
+                if mod.type == "ARMATURE" and mod.object:
+                    index.setdefault(mod.object, []).append((obj, "modifier", mod))
+
+            constraints = list(obj.constraints)
+            if obj.pose:
+                constraints += [constraint for poseBone in obj.pose.bones for constraint in poseBone.constraints]
+            for constraint in constraints:
+                if constraint.type == "ARMATURE":
+                    for target in constraint.targets:
+                        if target.target:
+                            index.setdefault(target.target, []).append((obj, "armature constraint target", target))
+                elif getattr(constraint, "target", None) and constraint.target.type == "ARMATURE":
+                    index.setdefault(constraint.target, []).append((obj, "constraint", constraint))
+
+            if obj.parent and obj.parent.type == "ARMATURE":
+                index.setdefault(obj.parent, []).append((obj, "parent", obj))
+        return index
+
+    @staticmethod
+    def rebind(kind, item, newRig):
+        if kind == "modifier":
+            item.object = newRig
+        elif kind == "parent":
+            matrixWorld = item.matrix_world.copy()
+            item.parent = newRig
+            item.matrix_world = matrixWorld
+        else:
+            item.target = newRig
+
 
 class GenerateRig(bpy.types.Operator):
     # set bl_ properties
-    bl_description = 'Generates a GRT rig from the selected Rigify metarig. An optional add-on rig will be joined to the Rigify control rig before generating the GRT deform rig. The selected bones in this add-on rig are parented to the "head" bone.'
+    bl_description = 'Generates a GRT rig from each selected Rigify metarig. An optional add-on rig will be joined to the Rigify control rig before generating the GRT deform rig. The selected bones in this add-on rig are parented to the "head" bone.'
     bl_idname = "object.generate_grt_rig_from_rigify_metarig"
     bl_label = "Rigify Metarig To GRT"
     bl_options = {"REGISTER", "UNDO", "PRESET"}
@@ -157,23 +504,45 @@ class GenerateRig(bpy.types.Operator):
             self.parent = parent
             self.direction = direction
 
+    # (object name, mode, seconds) for each mode switch of the last run
+    lastModeSwitches = []
+    # Stage name -> seconds for the last run
+    lastStageTimings = {}
+    # Cache use and COPY_SCALE counts of the last run
+    lastRun = {}
+
+    # Collections the deform, control and metarig objects are moved to
+    layerNames = ["Deform", "Control", "Metarig"]
+
+    # rigify_parameters set on the metarig before generating
+    limbOverrides = {
+        "upper_arm.L": {"segments": 1},
+        "upper_arm.R": {"segments": 1},
+        "thigh.L": {"segments": 1, "rotation_axis": "x", "auto_align_extremity": True},
+        "thigh.R": {"segments": 1, "rotation_axis": "x", "auto_align_extremity": True},
+    }
+
     correctiveHelpers = [
         CorrectiveHelperInfo("DEF-elbow", "DEF-forearm", "DEF-upper_arm", mathutils.Vector((0, 0.5, 0))),
         CorrectiveHelperInfo("DEF-knee", "DEF-shin", "DEF-thigh", mathutils.Vector((0, -0.5, 0))),
         CorrectiveHelperInfo("DEF-butt", "DEF-thigh", "DEF-pelvis", mathutils.Vector((0, 0.5, 0))),
     ]
 
-    # add butt/knee/elbow bones to help with joint deformations
-    def addCorrectiveHelpers(self, ikRigObj: bpy.types.Object):
-        bpy.ops.object.select_all(action="DESELECT")
-        ikRigObj.select_set(True)
-        bpy.context.view_layer.objects.active = ikRigObj
+    # Switch the active object's mode, keeping count of switches since each one rebuilds/syncs the armature
+    @staticmethod
+    def setMode(mode, modeSwitches):
+        start = time.perf_counter()
+        bpy.ops.object.mode_set(mode=mode)
+        modeSwitches.append((bpy.context.active_object.name, mode, time.perf_counter() - start))
 
-        bpy.ops.object.mode_set(mode="EDIT")
+    # add butt/knee/elbow bones to help with joint deformations
+    # must be called in edit mode on the control rig
+    @classmethod
+    def addCorrectiveHelperBones(cls, ikRigObj: bpy.types.Object):
         editBones = ikRigObj.data.edit_bones
         
         # add corrective bones in edit mode
-        for correctiveHelper in self.correctiveHelpers:
+        for correctiveHelper in cls.correctiveHelpers:
             for side in ["L", "R"]:
                 editBone = editBones.new(f"{correctiveHelper.name}.{side}")
                 editBone.head = editBones[f"{correctiveHelper.target}.{side}"].head
@@ -182,10 +551,11 @@ class GenerateRig(bpy.types.Operator):
                 
                 ikRigObj.data.collections["DEF"].assign(editBone)
 
-        # add constraints in pose mode
-        bpy.ops.object.mode_set(mode="POSE")
+    # add constraints to the corrective bones through pose data, no mode switch needed outside of edit mode
+    @classmethod
+    def addCorrectiveHelperConstraints(cls, ikRigObj: bpy.types.Object):
         poseBones = ikRigObj.pose.bones
-        for correctiveHelper in self.correctiveHelpers:
+        for correctiveHelper in cls.correctiveHelpers:
             for side in ["L", "R"]:
                 if correctiveHelper.name == "DEF-butt":
                     # butt affected by thigh
@@ -272,38 +642,100 @@ class GenerateRig(bpy.types.Operator):
                     constraint.to_min_z_rot = radians(-90)
                     constraint.to_max_z_rot = radians(90)
 
-        bpy.ops.object.mode_set(mode="OBJECT")
-
-    # Called on demand (i.e. button press, menu item)
-    # Can also be called from operator search menu (Spacebar)
-    def execute(self, context):
-        if len(context.selected_objects) == 0:
-            raise RuntimeError("Armature not selected.")
-        elif type(context.selected_objects[0].data) is not bpy.types.Armature:
-            raise RuntimeError("Armature not selected.")
-
-        metarigObj = context.selected_objects[0]
-
-        if context.mode != "POSE":
-            bpy.ops.object.mode_set(mode="POSE")
+    # Constraint types that make the owner scale whenever their target moves
+    scaleSourceConstraints = {"STRETCH_TO", "SPLINE_IK", "ACTION"}
+    # Constraint types that pass the target's scale on to the owner
+    scaleCopyConstraints = {"COPY_SCALE", "COPY_TRANSFORMS", "CHILD_OF", "ARMATURE"}
 
-        # Keep track of these bones to reparent in GRT rig
-        faceBoneNames = [
-            bone.name for bone in metarigObj.data.bones["spine.006"].children_recursive
-        ]
+    # Names of control rig bones whose scale can change during animation
+    @classmethod
+    def getScalingBones(cls, rigObj: bpy.types.Object):
+        # Scale channels that are keyed or driven anywhere. Actions baked onto deform rigs key scale on every bone,
+        # they would make every bone a source.
+        animatedBones = set()
+        fcurves = [fcurve for action in getControlRigActions() for fcurve in action.fcurves]
+        if rigObj.animation_data:
+            fcurves += list(rigObj.animation_data.drivers)
+        for fcurve in fcurves:
+            match = re.match(r"pose\.bones\[\"(.*)\"\]\.scale", fcurve.data_path)
+            if match:
+                animatedBones.add(match.group(1))
+
+        sources = set()
+        dependencies = {}
+        for poseBone in rigObj.pose.bones:
+            name = poseBone.name
+            # Only animator facing controls are expected to be scaled by hand
+            isControl = not name.startswith(("DEF-", "ORG-", "MCH-"))
+            if name in animatedBones or (isControl and not all(poseBone.lock_scale)):
+                sources.add(name)
+
+            dependencies[name] = []
+            bone = poseBone.bone
+            if bone.parent and bone.inherit_scale != "NONE":
+                dependencies[name].append(bone.parent.name)
+
+            for constraint in poseBone.constraints:
+                if constraint.mute:
+                    continue
+                if constraint.type in cls.scaleSourceConstraints or (
+                    constraint.type == "TRANSFORM" and constraint.map_to == "SCALE"
+                ):
+                    sources.add(name)
+                elif constraint.type == "ARMATURE":
+                    dependencies[name] += [
+                        target.subtarget for target in constraint.targets if target.target == rigObj
+                    ]
+                elif constraint.type in cls.scaleCopyConstraints:
+                    if constraint.target == rigObj and constraint.subtarget:
+                        dependencies[name].append(constraint.subtarget)
+
+        # A bone scales if it is a source or depends on a bone that scales
+        canScale = {}
+
+        def resolve(name):
+            if name not in canScale:
+                canScale[name] = False  # guards against dependency cycles
+                canScale[name] = name in sources or any(
+                    resolve(dependency) for dependency in dependencies.get(name, [])
+                )
+            return canScale[name]
+
+        return {name for name in dependencies if resolve(name)}
+
+    # Copy scale from the control rig to the given GRT pose bones.
+    # When selective, bones are skipped if neither they nor any GRT parent they inherit scale from can scale.
+    @classmethod
+    def addCopyScaleConstraints(cls, GRTRigObj, ikRigObj, poseBones, selective):
+        needsScale = {}
+        if selective:
+            scalingBones = cls.getScalingBones(ikRigObj)
+
+            def resolve(bone):
+                if bone.name not in needsScale:
+                    needsScale[bone.name] = bone.name in scalingBones or (
+                        bone.parent is not None and bone.inherit_scale != "NONE" and resolve(bone.parent)
+                    )
+                return needsScale[bone.name]
 
-        # Make IK rig use single bones for each limb, allowing for 2-bone game IK to work
-        for limbName in ["upper_arm.L", "upper_arm.R", "thigh.L", "thigh.R"]:
-            poseBone = metarigObj.pose.bones[limbName]
-            poseBone.rigify_parameters.segments = 1
+        added = skipped = 0
+        for poseBone in poseBones:
+            if selective and not resolve(poseBone.bone):
+                skipped += 1
+                continue
+            constraint = poseBone.constraints.new(type="COPY_SCALE")
+            constraint.target = ikRigObj
+            constraint.subtarget = poseBone.name
+            added += 1
 
-        for limbName in ["thigh.L", "thigh.R"]:
-            # Set rotation axis so that knees bend forward
-            poseBone = metarigObj.pose.bones[limbName]
-            poseBone.rigify_parameters.rotation_axis = "x"
-            poseBone.rigify_parameters.auto_align_extremity = True
+        GRTRigObj["grt_copy_scale_count"] = GRTRigObj.get("grt_copy_scale_count", 0) + added
+        GRTRigObj["grt_copy_scale_skipped"] = GRTRigObj.get("grt_copy_scale_skipped", 0) + skipped
+        return added, skipped
 
-        bpy.ops.object.mode_set(mode="OBJECT")
+    # Generates the Rigify control rig, joins the add-on rig and adds corrective helpers
+    @classmethod
+    def generateControlRig(cls, metarigObj, shapeKeyRigOriginal, timer, modeSwitches):
+        timer.start("rigify_generate")
         bpy.ops.pose.rigify_generate()
         ikRigObj = bpy.context.active_object
 
@@ -332,51 +764,164 @@ class GenerateRig(bpy.types.Operator):
         constraint.use_z = False
 
         # Add shape key rig if applicable.
-        shapeKeyRigOriginal = bpy.context.scene.rigifyToGRTProperty.shapeKeyRig
+        timer.start("addon_join")
         shapeKeyRigBoneNames = []
+        addonBoneNames = []
         if shapeKeyRigOriginal:
-            
-            # Duplicate shape key rig before use
-            shapeKeyRig = shapeKeyRigOriginal.copy()
-            shapeKeyRig.data = shapeKeyRigOriginal.data.copy()
-            for col in ikRigObj.users_collection:
-                col.objects.link(shapeKeyRig)
-            
-            shapeKeyRigBoneNames = [
-                bone.name for bone in shapeKeyRig.data.bones if bone.parent is None
-            ]
-            bpy.ops.object.select_all(action="DESELECT")
-            shapeKeyRig.select_set(True)
-            ikRigObj.select_set(True)
-            bpy.context.view_layer.objects.active = ikRigObj
-            bpy.ops.object.join()
-
-            bpy.ops.object.mode_set(mode="EDIT")
-            controlEditBones = ikRigObj.data.edit_bones
-            for childBoneName in shapeKeyRigBoneNames:
-                controlEditBones[childBoneName].parent = controlEditBones["head"]
-
-            # TODO: Handle bone parenting, not all bones should be parented?
-
-        # Set ik rig to source armature - need it for game rig generation, so we just set other settings while we're here
-        bpy.ops.object.mode_set(mode="OBJECT")
-        GRTSettings = context.scene.GRT_Action_Bakery_Global_Settings
-        GRTSettings.Overwrite = True
-        GRTSettings.Push_to_NLA = False
-        GRTSettings.Source_Armature = ikRigObj
+            shapeKeyRigBoneNames, addonBoneNames = cls.joinAddonRig(ikRigObj, shapeKeyRigOriginal)
 
-        self.addCorrectiveHelpers(ikRigObj)
-
-        bpy.ops.gamerigtool.generate_game_rig(Deform_Armature_Name="Armature")
-        bpy.ops.object.mode_set(mode="EDIT")
+        # Single edit session on the control rig for add-on rig parenting and corrective helpers
+        timer.start("corrective_helpers")
+        # Only the control rig may be selected, otherwise the metarig joins the multi-object edit session
+        metarigObj.select_set(False)
+        ikRigObj.select_set(True)
+        bpy.context.view_layer.objects.active = ikRigObj
+        cls.setMode("EDIT", modeSwitches)
+        controlEditBones = ikRigObj.data.edit_bones
+        for childBoneName in shapeKeyRigBoneNames:
+            controlEditBones[childBoneName].parent = controlEditBones["head"]
+
+        # TODO: Handle bone parenting, not all bones should be parented?
+
+        cls.addCorrectiveHelperBones(ikRigObj)
+        cls.setMode("OBJECT", modeSwitches)
+        cls.addCorrectiveHelperConstraints(ikRigObj)
+
+        ikRigObj["grt_addon_root_bones"] = shapeKeyRigBoneNames
+        ikRigObj["grt_addon_bones"] = addonBoneNames
+        return ikRigObj, shapeKeyRigBoneNames
+
+    # Joins a copy of the add-on rig into the control rig, the original is left untouched. With boneSuffix the copied
+    # bones are renamed first, so they cannot clash with bones already on the control rig.
+    # Returns (root bone names, all bone names), without the suffix.
+    @staticmethod
+    def joinAddonRig(ikRigObj, shapeKeyRigOriginal, boneSuffix=""):
+        shapeKeyRig = shapeKeyRigOriginal.copy()
+        shapeKeyRig.data = shapeKeyRigOriginal.data.copy()
+        for col in ikRigObj.users_collection:
+            col.objects.link(shapeKeyRig)
+
+        rootBoneNames = [bone.name for bone in shapeKeyRig.data.bones if bone.parent is None]
+        boneNames = [bone.name for bone in shapeKeyRig.data.bones]
+        if boneSuffix:
+            for bone in shapeKeyRig.data.bones:
+                bone.name = bone.name + boneSuffix
+
+        addonArmature = shapeKeyRig.data
+        setSelection([shapeKeyRig, ikRigObj], ikRigObj)
+        bpy.ops.object.join()
+        # Join removes the copied object but leaves its armature data behind
+        if addonArmature.users == 0:
+            bpy.data.armatures.remove(addonArmature)
+        return rootBoneNames, boneNames
+
+    @staticmethod
+    def replaceDeformRig(oldRigObj, newRigObj):
+        oldArmature = oldRigObj.data
+        name = oldRigObj.name
+        oldRigObj.user_remap(newRigObj)
+        bpy.data.objects.remove(oldRigObj)
+        if oldArmature.users == 0:
+            bpy.data.armatures.remove(oldArmature)
+        newRigObj.name = name
+
+    # Hash of everything that goes into the control rig: metarig rest pose, rigify parameters, add-on rig and limb overrides
+    @classmethod
+    def getFingerprint(cls, metarigObj, shapeKeyRigObj):
+        fingerprint = hashlib.sha256()
+        fingerprint.update(repr(cls.limbOverrides).encode())
 
-        # Reparent bones on GRT rig so that hierarchy makes sense in Unreal
-        # Every bone should be in same hierarchy under the root bone
-        GRTRigObj = bpy.context.active_object
-        GRTRigObj.data.display_type = "STICK"
-        GRTSettings.Target_Armature = GRTRigObj
-        editBones = GRTRigObj.data.edit_bones
+        for rigObj in [metarigObj, shapeKeyRigObj]:
+            if rigObj is None:
+                fingerprint.update(b"None")
+                continue
+            bones = rigObj.data.bones
+            fingerprint.update(
+                repr(
+                    [(bone.name, bone.parent.name if bone.parent else None, bone.use_deform) for bone in bones]
+                ).encode()
+            )
+            for attribute in ["head_local", "tail_local"]:
+                values = np.empty(len(bones) * 3, dtype=np.float32)
+                bones.foreach_get(attribute, values)
+                fingerprint.update(values.tobytes())
+            fingerprint.update(readBoneRestMatrices(rigObj.data).tobytes())
+
+        # The add-on rig is joined in world space, with its constraints, drivers, custom properties and bone
+        # collections
+        if shapeKeyRigObj:
+            fingerprint.update(np.array(shapeKeyRigObj.matrix_world, dtype=np.float32).tobytes())
+            fingerprint.update(repr(cls.getRigSetupValues(shapeKeyRigObj)).encode())
+
+        for poseBone in metarigObj.pose.bones:
+            fingerprint.update(
+                repr((poseBone.name, poseBone.rigify_type, cls.getPropertyValues(poseBone.rigify_parameters))).encode()
+            )
+        return fingerprint.hexdigest()
+
+    # Everything on a rig besides its bones that a join carries over into the control rig
+    @classmethod
+    def getRigSetupValues(cls, rigObj):
+        values = [cls.getCustomProperties(rigObj), cls.getCustomProperties(rigObj.data)]
+        for poseBone in rigObj.pose.bones:
+            values.append(
+                (
+                    poseBone.name,
+                    cls.getCustomProperties(poseBone),
+                    cls.getCustomProperties(poseBone.bone),
+                    [
+                        (
+                            constraint.type,
+                            cls.getPropertyValues(constraint),
+                            # Armature constraint targets are a collection of unnamed structs
+                            [cls.getPropertyValues(target) for target in getattr(constraint, "targets", [])],
+                        )
+                        for constraint in poseBone.constraints
+                    ],
+                )
+            )
+        for idData in [rigObj, rigObj.data]:
+            if idData.animation_data is None:
+                continue
+            for fcurve in idData.animation_data.drivers:
+                driverInfo = ShapeKeyDriverInfo.fromDriver(fcurve.data_path, fcurve.driver)
+                values.append((fcurve.data_path, fcurve.array_index, driverInfo.fingerprint()))
+        for boneCollection in getattr(rigObj.data, "collections_all", []):
+            values.append((boneCollection.name, [bone.name for bone in boneCollection.bones]))
+        return values
+
+    @staticmethod
+    def getCustomProperties(owner):
+        values = []
+        for key in sorted(owner.keys()):
+            value = owner[key]
+            if hasattr(value, "to_dict"):
+                value = value.to_dict()
+            elif hasattr(value, "to_list"):
+                value = value.to_list()
+            values.append((key, value))
+        return values
 
+    @classmethod
+    def getPropertyValues(cls, struct):
+        values = []
+        for rnaProperty in struct.bl_rna.properties:
+            if rnaProperty.identifier == "rna_type":
+                continue
+            value = getattr(struct, rnaProperty.identifier)
+            if rnaProperty.type == "POINTER":
+                value = getattr(value, "name", None)
+            elif rnaProperty.type == "COLLECTION":
+                value = [getattr(item, "name", None) for item in value]
+            elif getattr(rnaProperty, "is_array", False):
+                value = tuple(value)
+            values.append((rnaProperty.identifier, value))
+        return values
+
+    # Reparent bones on GRT rig so that hierarchy makes sense in Unreal
+    # Every bone should be in same hierarchy under the root bone. Must be called in edit mode on the GRT rig.
+    @staticmethod
+    def reparentDeformBones(editBones, faceBoneNames, shapeKeyRigBoneNames):
         # Arms to Shoulders
         editBones["DEF-upper_arm.L"].parent = editBones["DEF-shoulder.L"]
         editBones["DEF-upper_arm.R"].parent = editBones["DEF-shoulder.R"]
@@ -410,28 +955,120 @@ class GenerateRig(bpy.types.Operator):
         # Shape Key Bones to Head
         for childName in shapeKeyRigBoneNames:
             editBones[childName].parent = editBones["DEF-spine.006"]
-            
-        bpy.ops.object.mode_set(mode="POSE")
+
+    # Deform/Control/Metarig collections and GRT bakery settings, shared by every rig generated in a run
+    @classmethod
+    def prepareScene(cls, scene):
+        GRTSettings = scene.GRT_Action_Bakery_Global_Settings
+        GRTSettings.Overwrite = True
+        GRTSettings.Push_to_NLA = False
+
+        collections = {}
+        for name in cls.layerNames:
+            collections[name] = bpy.data.collections.get(name)
+            if collections[name] is None:
+                collections[name] = bpy.data.collections.new(name)
+                scene.collection.children.link(collections[name])
+        return collections
+
+    # Name used for the deform rig when several characters are generated at once
+    @staticmethod
+    def getCharacterName(metarigObj):
+        return metarigObj.get("grt_character_name", metarigObj.name)
+
+    # Generates the control and GRT deform rigs from a metarig, returns (control rig, deform rig).
+    # Selection and the active object are changed along the way, see generateRig() for a version that restores them.
+    @classmethod
+    def generate(
+        cls,
+        metarigObj,
+        shapeKeyRigOriginal=None,
+        copyScaleMode="All",
+        forceFullRegenerate=False,
+        deformRigName="Armature",
+        collections=None,
+        purge=True,
+    ):
+        if collections is None:
+            collections = cls.prepareScene(bpy.context.scene)
+        modeSwitches = []
+        timer = StageTimer()
+        timer.start("metarig_prep")
+        generationId = metarigObj.get("grt_generation_id", 0) + 1
+
+        # Metarig parameters are set through pose data, so only leave edit/pose mode if needed
+        if bpy.context.mode != "OBJECT":
+            cls.setMode("OBJECT", modeSwitches)
+
+        # Rigify generates from the active object
+        metarigObj.hide_set(False)
+        setSelection([metarigObj], metarigObj)
+
+        # Keep track of these bones to reparent in GRT rig
+        faceBoneNames = [
+            bone.name for bone in metarigObj.data.bones["spine.006"].children_recursive
+        ]
+
+        # Make IK rig use single bones for each limb, allowing for 2-bone game IK to work
+        # Set rotation axis so that knees bend forward
+        for limbName, parameters in cls.limbOverrides.items():
+            poseBone = metarigObj.pose.bones[limbName]
+            for parameter, value in parameters.items():
+                setattr(poseBone.rigify_parameters, parameter, value)
+
+        # Reuse the control rig from the last run if nothing that goes into it has changed
+        fingerprint = cls.getFingerprint(metarigObj, shapeKeyRigOriginal)
+        ikRigObj = getattr(metarigObj.data, "rigify_target_rig", None)
+        usedCache = (
+            not forceFullRegenerate
+            and ikRigObj is not None
+            and ikRigObj.get("grt_fingerprint") == fingerprint
+        )
+        if usedCache:
+            shapeKeyRigBoneNames = list(ikRigObj.get("grt_addon_root_bones", []))
+            metarigObj.select_set(False)
+            ikRigObj.hide_set(False)
+            ikRigObj.select_set(True)
+            bpy.context.view_layer.objects.active = ikRigObj
+        else:
+            ikRigObj, shapeKeyRigBoneNames = cls.generateControlRig(
+                metarigObj, shapeKeyRigOriginal, timer, modeSwitches
+            )
+            ikRigObj["grt_fingerprint"] = fingerprint
+        previousGRTRigObj = ikRigObj.get("grt_deform_rig")
+
+        # Set ik rig to source armature - need it for game rig generation, other settings are set in prepareScene()
+        GRTSettings = bpy.context.scene.GRT_Action_Bakery_Global_Settings
+        GRTSettings.Source_Armature = ikRigObj
+
+        timer.start("grt_generate")
+        bpy.ops.gamerigtool.generate_game_rig(Deform_Armature_Name=deformRigName)
+        timer.start("reparenting")
+        ikRigObj.select_set(False)
+        cls.setMode("EDIT", modeSwitches)
+
+        GRTRigObj = bpy.context.active_object
+        GRTRigObj.data.display_type = "STICK"
+        GRTSettings.Target_Armature = GRTRigObj
+        editBones = GRTRigObj.data.edit_bones
+
+        cls.reparentDeformBones(editBones, faceBoneNames, shapeKeyRigBoneNames)
+        cls.setMode("OBJECT", modeSwitches)
         
         # Add mising copy scale, which is not done by GameRigTools
-        for poseBone in GRTRigObj.pose.bones:
-            constraint = poseBone.constraints.new(type="COPY_SCALE")
-            constraint.target = ikRigObj
-            constraint.subtarget = poseBone.name
+        timer.start("copy_scale")
+        copyScaleCount, copyScaleSkipped = cls.addCopyScaleConstraints(
+            GRTRigObj, ikRigObj, GRTRigObj.pose.bones, copyScaleMode == "Selective"
+        )
 
-        bpy.ops.object.mode_set(mode="OBJECT")
+        # When reusing the control rig, swap the new deform rig in for the old one everywhere it is used
+        ikRigObj["grt_deform_rig"] = GRTRigObj
+        if usedCache and previousGRTRigObj is not None and previousGRTRigObj != GRTRigObj:
+            cls.replaceDeformRig(previousGRTRigObj, GRTRigObj)
 
         # Add/Reorder collections
-        collections = {}
-        sceneCollection = bpy.context.scene.collection
+        timer.start("collection_setup")
         activeCollection = bpy.context.view_layer.active_layer_collection.collection
-        layerNames = ["Deform", "Control", "Metarig"]
-        for name in layerNames:
-            if name not in bpy.data.collections:
-                collections[name] = bpy.data.collections.new(name)
-                sceneCollection.children.link(collections[name])
-            else:
-                collections[name] = bpy.data.collections[name]
 
         # children = sceneCollection.children[:]
         # try:
@@ -448,21 +1085,222 @@ class GenerateRig(bpy.types.Operator):
         # except ValueError:
         #    print("Control/Deform collection not found.")
 
-        # Add rigs to correct collections
-        for name, rig in tuple(zip(layerNames, [GRTRigObj, ikRigObj, metarigObj])):
+        # Add rigs to correct collections, checked by name instead of building lists of the collections' objects
+        for name, rig in tuple(zip(cls.layerNames, [GRTRigObj, ikRigObj, metarigObj])):
             if not rig:
                 continue
-            if rig not in collections[name].objects[:]:
+            if collections[name].objects.get(rig.name) != rig:
                 collections[name].objects.link(rig)
-                if rig in activeCollection.objects[:]:
+                if activeCollection.objects.get(rig.name) == rig:
                     activeCollection.objects.unlink(rig)
 
         metarigObj.hide_set(True)
 
-        self.report({"INFO"}, "Finished")
+        # Reused datablocks are tagged again, anything left from earlier generations is removed unless the caller
+        # purges once for a whole batch
+        timer.start("purge")
+        metarigObj["grt_generation_id"] = generationId
+        tagGeneration([ikRigObj, ikRigObj.data, GRTRigObj, GRTRigObj.data], metarigObj, generationId)
+        purged = purgeGenerationData([metarigObj.name]) if purge else None
+
+        timer.stop()
+        cls.lastStageTimings = dict(timer.timings)
+        GRTRigObj["grt_stage_timings"] = timer.timings
+        for stage, seconds in timer.timings.items():
+            print(f"{stage}: {seconds:.3f}s")
+
+        cls.lastModeSwitches = modeSwitches
+        cls.lastRun = {
+            "used_cache": usedCache,
+            "copy_scale_added": copyScaleCount,
+            "copy_scale_skipped": copyScaleSkipped,
+            "purged": purged,
+            "summary": timer.summary(),
+        }
+        return ikRigObj, GRTRigObj
+
+    # Called on demand (i.e. button press, menu item)
+    # Can also be called from operator search menu (Spacebar)
+    def execute(self, context):
+        metarigObjs = [
+            obj
+            for obj in context.selected_objects
+            if obj.type == "ARMATURE" and any(poseBone.rigify_type for poseBone in obj.pose.bones)
+        ]
+        if not metarigObjs:
+            raise RuntimeError("Armature not selected.")
+
+        prop = context.scene.rigifyToGRTProperty
+        start = time.perf_counter()
+        results = generateRigs(metarigObjs, prop.shapeKeyRig, prop.copyScaleMode, prop.forceFullRegenerate)
+
+        # Scene-wide COPY_SCALE summary over every generated rig
+        rigsWithSkipped = [obj for obj in context.scene.objects if "grt_copy_scale_skipped" in obj]
+        for obj in rigsWithSkipped:
+            print(f"{obj.name}: {obj['grt_copy_scale_count']} COPY_SCALE constraints, {obj['grt_copy_scale_skipped']} skipped")
+        sceneSkipped = sum(obj["grt_copy_scale_skipped"] for obj in rigsWithSkipped)
+
+        failed = [name for name, result in results.items() if result["error"]]
+        for name in failed:
+            print(f"{name} failed: {results[name]['error']}")
+
+        if len(results) == 1 and not failed:
+            lastRun = self.lastRun
+            modeSwitchTime = sum(switch[2] for switch in self.lastModeSwitches)
+            self.report(
+                {"INFO"},
+                f"Finished ({'reused control rig, ' if lastRun['used_cache'] else ''}{len(self.lastModeSwitches)} mode switches, {modeSwitchTime:.2f}s, "
+                f"{lastRun['copy_scale_added']} COPY_SCALE added, {lastRun['copy_scale_skipped']} skipped, {sceneSkipped} skipped in scene, "
+                f"{lastRun['purged']['objects'] + lastRun['purged']['armatures']} old datablocks removed). "
+                f"{lastRun['summary']}",
+            )
+        else:
+            self.report(
+                {"WARNING"} if failed else {"INFO"},
+                f"Generated {len(results) - len(failed)} of {len(results)} rigs in {time.perf_counter() - start:.2f}s"
+                + (f", failed: {', '.join(failed)}" if failed else "")
+                + f" ({sceneSkipped} COPY_SCALE skipped in scene)",
+            )
         return {"FINISHED"}  # must return a set
 
 
+class UpdateAddonRig(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Replaces the add-on rig bones on the generated control and GRT rigs with the current add-on rig, without regenerating anything else."
+    bl_idname = "object.update_grt_addon_rig"
+    bl_label = "Update Add-on Rig"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    # Joined bones get a temporary suffix so they never clash with the old bones they replace
+    tempSuffix = "__grt_new"
+
+    def execute(self, context):
+        GRTSettings = context.scene.GRT_Action_Bakery_Global_Settings
+        ikRigObj = GRTSettings.Source_Armature
+        GRTRigObj = GRTSettings.Target_Armature
+        if ikRigObj is None or GRTRigObj is None:
+            raise RuntimeError("GRT source/target armatures not set, generate a rig first.")
+
+        start = time.perf_counter()
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        oldBoneNames = list(ikRigObj.get("grt_addon_bones", []))
+        shapeKeyRigOriginal = context.scene.rigifyToGRTProperty.shapeKeyRig
+
+        # Join a copy of the add-on rig into the control rig
+        shapeKeyRigBoneNames = []
+        addonBoneNames = []
+        if shapeKeyRigOriginal:
+            shapeKeyRigBoneNames, addonBoneNames = GenerateRig.joinAddonRig(
+                ikRigObj, shapeKeyRigOriginal, self.tempSuffix
+            )
+        else:
+            setSelection([ikRigObj], ikRigObj)
+
+        # Control rig: remove the old bones, give the new ones their real names and parent them to the head
+        bpy.ops.object.mode_set(mode="EDIT")
+        editBones = ikRigObj.data.edit_bones
+        for name in oldBoneNames:
+            if name in editBones:
+                editBones.remove(editBones[name])
+        for name in addonBoneNames:
+            editBones[name + self.tempSuffix].name = name
+        for name in shapeKeyRigBoneNames:
+            editBones[name].parent = editBones["head"]
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+        ikRigObj["grt_addon_root_bones"] = shapeKeyRigBoneNames
+        ikRigObj["grt_addon_bones"] = addonBoneNames
+
+        # GRT rig: same bones, deform only, in the same place as on the control rig
+        controlBones = ikRigObj.data.bones
+        deformBoneNames = [name for name in addonBoneNames if controlBones[name].use_deform]
+        referenceConstraints = [
+            constraint
+            for constraint in GRTRigObj.pose.bones["DEF-spine.006"].constraints
+            if constraint.type != "COPY_SCALE"
+        ]
+        referenceConstraints = [
+            (constraint.type, self.getConstraintSettings(constraint)) for constraint in referenceConstraints
+        ]
+
+        # The old bones' COPY_SCALE constraints go with them, take them out of the rig's counts
+        removedAdded = removedSkipped = 0
+        for name in oldBoneNames:
+            poseBone = GRTRigObj.pose.bones.get(name)
+            if poseBone is None:
+                continue
+            if any(constraint.type == "COPY_SCALE" for constraint in poseBone.constraints):
+                removedAdded += 1
+            else:
+                removedSkipped += 1
+        GRTRigObj["grt_copy_scale_count"] = max(0, GRTRigObj.get("grt_copy_scale_count", 0) - removedAdded)
+        GRTRigObj["grt_copy_scale_skipped"] = max(0, GRTRigObj.get("grt_copy_scale_skipped", 0) - removedSkipped)
+
+        GRTRigObj.hide_set(False)
+        setSelection([GRTRigObj], GRTRigObj)
+        bpy.ops.object.mode_set(mode="EDIT")
+        editBones = GRTRigObj.data.edit_bones
+        for name in oldBoneNames:
+            if name in editBones:
+                editBones.remove(editBones[name])
+        for name in deformBoneNames:
+            editBone = editBones.new(name)
+            editBone.head = controlBones[name].head_local
+            editBone.tail = controlBones[name].tail_local
+            editBone.matrix = controlBones[name].matrix_local
+            editBone.use_deform = True
+        for name in deformBoneNames:
+            parent = controlBones[name].parent
+            if parent and parent.name in deformBoneNames:
+                editBones[name].parent = editBones[parent.name]
+            else:
+                editBones[name].parent = editBones["DEF-spine.006"]
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+        # Follow the control rig the same way GRT does for its own bones
+        for name in deformBoneNames:
+            poseBone = GRTRigObj.pose.bones[name]
+            for constraintType, settings in referenceConstraints:
+                constraint = poseBone.constraints.new(type=constraintType)
+                for identifier, value in settings:
+                    setattr(constraint, identifier, value)
+                constraint.subtarget = name
+
+        copyScaleMode = context.scene.rigifyToGRTProperty.copyScaleMode
+        GenerateRig.addCopyScaleConstraints(
+            GRTRigObj, ikRigObj, [GRTRigObj.pose.bones[name] for name in deformBoneNames], copyScaleMode == "Selective"
+        )
+
+        # Keep the generation cache valid for the new add-on rig
+        for obj in bpy.data.objects:
+            if obj.type == "ARMATURE" and getattr(obj.data, "rigify_target_rig", None) == ikRigObj:
+                ikRigObj["grt_fingerprint"] = GenerateRig.getFingerprint(obj, shapeKeyRigOriginal)
+                break
+
+        self.report(
+            {"INFO"},
+            f"Replaced {len(oldBoneNames)} add-on bones with {len(addonBoneNames)} in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    def getConstraintSettings(self, constraint):
+        settings = []
+        for rnaProperty in constraint.bl_rna.properties:
+            if (
+                rnaProperty.is_readonly
+                or rnaProperty.type == "COLLECTION"
+                or rnaProperty.identifier in {"name", "subtarget"}
+            ):
+                continue
+            value = getattr(constraint, rnaProperty.identifier)
+            if getattr(rnaProperty, "is_array", False):
+                value = tuple(value)
+            settings.append((rnaProperty.identifier, value))
+        return settings
+
+
 class TransferShapeKeyDrivers(bpy.types.Operator):
     # set bl_ properties
     bl_description = "Copies shape key driver settings from the active object to all selected objects for any shared shape key names. This optionally sets a new target object for all driver variables."
@@ -489,54 +1327,49 @@ class TransferShapeKeyDrivers(bpy.types.Operator):
 
         targetRig = bpy.context.scene.rigifyToGRTProperty.rigObj
 
-        for target in targets:
-            if source.data.shape_keys.animation_data is None:
-                self.report({"ERROR"}, "No shape key data found on source object.")
-                return {"FINISHED"}
-            for fcurve in source.data.shape_keys.animation_data.drivers:
-                sourceDriver = fcurve.driver
-                shapeKeyName = self.getShapeKeyNameFromDriver(fcurve)
-                targetShapeKeys = target.data.shape_keys
-                if shapeKeyName and shapeKeyName in targetShapeKeys.key_blocks:
-                    targetShapeKey = targetShapeKeys.key_blocks[shapeKeyName]
-                    targetDriver = targetShapeKey.driver_add("value").driver
-                    targetDriver.type = sourceDriver.type
-                    targetDriver.expression = sourceDriver.expression
-
-                    for driverVar in sourceDriver.variables:
-                        targetDriverVar = targetDriver.variables.new()
-                        targetDriverVar.name = driverVar.name
-                        targetDriverVar.type = driverVar.type
-
-                        for i in range(len(driverVar.targets)):
-                            for value in [
-                                "bone_target",
-                                "data_path",
-                                "id",
-                                "rotation_mode",
-                                "transform_space",
-                                "transform_type",
-                            ]:
-                                setattr(
-                                    targetDriverVar.targets[i],
-                                    value,
-                                    getattr(driverVar.targets[i], value),
-                                )
-
-                            # New shape key drivers should target our deform rig
-                            if targetRig:
-                                targetDriverVar.targets[i].id = targetRig
-
-                    # Need to do this to force update of driver
-                    targetDriver.expression = targetDriver.expression
-
-                driver = fcurve.driver
-                driver.expression
-
-        self.report({"INFO"}, "Finished")
+        if source.data.shape_keys is None or source.data.shape_keys.animation_data is None:
+            self.report({"ERROR"}, "No shape key data found on source object.")
+            return {"FINISHED"}
+
+
+        prop = bpy.context.scene.rigifyToGRTProperty
+        start = time.perf_counter()
+        counts = transferShapeKeyDrivers(source, targets, targetRig, prop.syncDrivers, prop.removeStaleDrivers)
+
+        message = (
+            f"{counts['drivers']} source drivers to {len(targets)} meshes: {counts['created']} created, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['removed']} removed "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        print(message)
+        self.report({"INFO"}, message)
         return {"FINISHED"}  # must return a set
 
-    def getShapeKeyNameFromDriver(self, fcurve):
+    @classmethod
+    def compileDriverTable(cls, source, targetRig):
+        driverTable = []
+        for fcurve in source.data.shape_keys.animation_data.drivers:
+            shapeKeyName = cls.getShapeKeyNameFromDriver(fcurve)
+            if shapeKeyName:
+                # New shape key drivers should target our deform rig
+                driverTable.append(
+                    ShapeKeyDriverInfo.fromDriver(shapeKeyName, fcurve.driver, targetRig, simplify=True)
+                )
+        return driverTable
+
+    @classmethod
+    def getShapeKeyDrivers(cls, shapeKeys):
+        if shapeKeys.animation_data is None:
+            return {}
+        drivers = {}
+        for fcurve in shapeKeys.animation_data.drivers:
+            shapeKeyName = cls.getShapeKeyNameFromDriver(fcurve)
+            if shapeKeyName:
+                drivers[shapeKeyName] = fcurve
+        return drivers
+
+    @staticmethod
+    def getShapeKeyNameFromDriver(fcurve):
         match = re.match(r"key\_blocks\[\"(.*)\"\]\.value", fcurve.data_path)
         if match:
             return match.group(1)
@@ -544,6 +1377,1436 @@ class TransferShapeKeyDrivers(bpy.types.Operator):
             return None
 
 
+# Selection-independent API. These take explicit objects instead of reading the selection and the scene
+# properties, so scripts can call them directly. The operators above are thin wrappers around them.
+
+
+# Returns (control rig, deform rig). Rig generation has to go through operators, so the selection is
+# changed while it runs and put back afterwards unless restoreSelection is False.
+def generateRig(metarigObj, addonRigObj=None, copyScaleMode="All", forceFullRegenerate=False, restoreSelection=True):
+    if metarigObj is None or metarigObj.type != "ARMATURE":
+        raise RuntimeError("Metarig is not an armature.")
+
+    viewLayer = bpy.context.view_layer
+    previousSelection = list(bpy.context.selected_objects)
+    previousActive = viewLayer.objects.active
+    ikRigObj, GRTRigObj = GenerateRig.generate(metarigObj, addonRigObj, copyScaleMode, forceFullRegenerate)
+
+    if restoreSelection:
+        bpy.ops.object.select_all(action="DESELECT")
+        # Objects can be gone by now, e.g. a deform rig replaced by the new one
+        for obj in previousSelection:
+            try:
+                obj.select_set(True)
+            except ReferenceError:
+                pass
+        try:
+            viewLayer.objects.active = previousActive
+        except ReferenceError:
+            pass
+    return ikRigObj, GRTRigObj
+
+
+# Generates rigs for several metarigs, sharing the collections and GRT settings between them and purging
+# stale generations once at the end. GenerateRig.lastRun["purged"] then holds the counts for the whole batch.
+# Deform rigs are named "Armature" for a single metarig, "<character>_Armature" otherwise.
+# A failing metarig does not stop the others. Returns metarig name -> {"control", "deform", "error", "seconds"}.
+def generateRigs(metarigObjs, addonRigObj=None, copyScaleMode="All", forceFullRegenerate=False):
+    collections = GenerateRig.prepareScene(bpy.context.scene)
+    results = {}
+    for metarigObj in metarigObjs:
+        if len(metarigObjs) == 1:
+            deformRigName = "Armature"
+        else:
+            deformRigName = f"{GenerateRig.getCharacterName(metarigObj)}_Armature"
+
+        result = {"control": None, "deform": None, "error": None}
+        start = time.perf_counter()
+        try:
+            result["control"], result["deform"] = GenerateRig.generate(
+                metarigObj, addonRigObj, copyScaleMode, forceFullRegenerate, deformRigName, collections, purge=False
+            )
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+            # Leave edit mode so the next metarig starts clean
+            if bpy.context.mode != "OBJECT" and bpy.context.view_layer.objects.active:
+                bpy.ops.object.mode_set(mode="OBJECT")
+        result["seconds"] = time.perf_counter() - start
+        results[metarigObj.name] = result
+
+    # One pass over the file for every metarig that generated, failed ones keep their previous generation
+    generatedNames = [name for name, result in results.items() if result["error"] is None]
+    if generatedNames:
+        GenerateRig.lastRun["purged"] = purgeGenerationData(generatedNames)
+    return results
+
+
+# Copies the source mesh's shape key drivers to each target mesh by shape key name.
+# Returns counts of source drivers and of created, updated, unchanged and removed target drivers.
+def transferShapeKeyDrivers(source, targets, targetRig=None, sync=True, removeStale=False):
+    if source.data.shape_keys is None or source.data.shape_keys.animation_data is None:
+        raise RuntimeError("No shape key data found on source object.")
+
+    # Read the source drivers once, then stamp them onto every target
+    driverTable = TransferShapeKeyDrivers.compileDriverTable(source, targetRig)
+    counts = {"drivers": len(driverTable), "created": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    for target in targets:
+        targetShapeKeys = target.data.shape_keys
+        if targetShapeKeys is None:
+            continue
+        keyBlocks = {keyBlock.name: keyBlock for keyBlock in targetShapeKeys.key_blocks}
+        existingDrivers = TransferShapeKeyDrivers.getShapeKeyDrivers(targetShapeKeys)
+
+        for driverInfo in driverTable:
+            keyBlock = keyBlocks.get(driverInfo.shapeKeyName)
+            if not keyBlock:
+                continue
+            fcurve = existingDrivers.pop(driverInfo.shapeKeyName, None)
+            if fcurve is None:
+                driverInfo.apply(keyBlock)
+                counts["created"] += 1
+            elif (
+                not sync
+                or ShapeKeyDriverInfo.fromDriver(driverInfo.shapeKeyName, fcurve.driver).fingerprint()
+                != driverInfo.fingerprint()
+            ):
+                driverInfo.apply(keyBlock)
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+
+        # Anything left over drives a shape key that has no driver on the source
+        if removeStale:
+            for fcurve in existingDrivers.values():
+                targetShapeKeys.animation_data.drivers.remove(fcurve)
+                counts["removed"] += 1
+    return counts
+
+
+# Sets up drivers for the named bones of the rig on every mesh it deforms, using a driver preset by name.
+# Returns (drivers created, shape keys bound).
+def setupShapeKeyDrivers(
+    rigObj, boneNames, shapeKeyType, activeBoneName=None, searchAllSkinnedMeshes=False, scene=None
+):
+    poseBones = [rigObj.pose.bones[name] for name in boneNames]
+    activeBone = rigObj.pose.bones.get(activeBoneName) if activeBoneName else None
+    shapeKeyIndex = SetupShapekeyDriver.buildShapeKeyIndex(
+        rigObj, scene or bpy.context.scene, searchAllSkinnedMeshes
+    )
+    bindings = SetupShapekeyDriver.getBindings(rigObj, shapeKeyType, poseBones, activeBone)
+
+    # Each driver is created exactly once, even if several meshes or bones share a shape key
+    driverCount = 0
+    for driverInfo in bindings:
+        for obj, keyBlock in shapeKeyIndex.get(driverInfo.shapeKeyName, []):
+            driverInfo.apply(keyBlock)
+            driverCount += 1
+    return driverCount, len(bindings)
+
+
+# Points references in objs to newRig and returns them as (object, kind, item).
+# With oldRig, every modifier, constraint and parent using it is rebound.
+# Without it, only the first armature modifier of each object is, whatever armature it used.
+def rebindArmatures(newRig, objs, oldRig=None, dryRun=False):
+    if oldRig is None:
+        users = []
+        for obj in objs:
+            if obj == newRig:
+                continue
+            for mod in obj.modifiers:
+                if mod.type == "ARMATURE":
+                    users.append((obj, "modifier", mod))
+                    break  # Only update the first armature modifier
+    else:
+        users = UpdateArmatureReferences.buildArmatureIndex(
+            [obj for obj in objs if obj not in (newRig, oldRig)]
+        ).get(oldRig, [])
+
+    for obj, kind, item in users:
+        print(f"{'Would rebind' if dryRun else 'Rebinding'} {kind} on {obj.name}")
+        if not dryRun:
+            UpdateArmatureReferences.rebind(kind, item, newRig)
+    return users
+
+
+class AuditDrivers(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Lists every scripted driver in the file that cannot use Blender's simple expression evaluator and falls back to Python. Optionally rewrites them to an equivalent simple expression where possible."
+    bl_idname = "object.audit_drivers"
+    bl_label = "Audit Drivers"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    def execute(self, context):
+        rewrite = bpy.context.scene.rigifyToGRTProperty.rewriteSlowDrivers
+
+        driverCount = 0
+        slowDrivers = []
+        rewritten = 0
+        for idData, fcurve in self.getAllDrivers():
+            driver = fcurve.driver
+            driverCount += 1
+            if driver.type != "SCRIPTED" or driver.is_simple_expression:
+                continue
+
+            if rewrite:
+                expression = driver.expression
+                simplified = simplifyDriverExpression(expression)
+                if simplified != expression:
+                    driver.expression = simplified
+                    if driver.is_simple_expression:
+                        rewritten += 1
+                        print(f"Rewrote {idData.name}: {fcurve.data_path}: {expression} -> {simplified}")
+                        continue
+                    driver.expression = expression
+
+            slowDrivers.append((idData, fcurve))
+            print(f"Python driver {idData.name}: {fcurve.data_path}: {driver.expression}")
+
+        message = f"{driverCount} drivers, {len(slowDrivers)} evaluated in Python"
+        if rewrite:
+            message += f", {rewritten} rewritten"
+        self.report({"WARNING"} if slowDrivers else {"INFO"}, message)
+        return {"FINISHED"}
+
+    # Drivers on every ID in the file, including node trees embedded in materials, worlds, lights and scenes
+    @staticmethod
+    def getAllDrivers():
+        for rnaProperty in bpy.data.bl_rna.properties:
+            if rnaProperty.type != "COLLECTION":
+                continue
+            for idData in getattr(bpy.data, rnaProperty.identifier):
+                for owner in [idData, getattr(idData, "node_tree", None)]:
+                    animData = getattr(owner, "animation_data", None)
+                    if animData is None:
+                        continue
+                    for fcurve in animData.drivers:
+                        yield owner, fcurve
+
+
+class ProfileRigPlayback(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Steps through the profiling action (or the scene frame range) and times depsgraph evaluation per frame for the GRT source/target rigs. Compares against the control rig alone and attributes cost to constraint types and shape key drivers by muting them."
+    bl_idname = "object.profile_rig_playback"
+    bl_label = "Profile Rig Playback"
+    bl_options = {"REGISTER"}
+
+    # Results of the last run, for scripts and the command line
+    lastResults = {}
+
+    def execute(self, context):
+        GRTSettings = context.scene.GRT_Action_Bakery_Global_Settings
+        controlRig = GRTSettings.Source_Armature
+        deformRig = GRTSettings.Target_Armature
+        if controlRig is None or deformRig is None:
+            raise RuntimeError("GRT source/target armatures not set, generate a rig first.")
+
+        prop = context.scene.rigifyToGRTProperty
+        results = self.profile(context.scene, controlRig, deformRig, prop.profileAction, prop.profileFrameStep)
+        ProfileRigPlayback.lastResults = results
+
+        for name, stats in results["passes"].items():
+            print(f"{name}: mean {stats['mean'] * 1000:.2f}ms, p95 {stats['p95'] * 1000:.2f}ms")
+        for name, cost in results["attribution"].items():
+            print(f"{name}: {cost['count']} items, {cost['mean'] * 1000:.2f}ms per frame")
+
+        full = results["passes"]["full"]
+        controlOnly = results["passes"]["control_only"]
+        self.report(
+            {"INFO"},
+            f"{results['frames']} frames: mean {full['mean'] * 1000:.2f}ms, p95 {full['p95'] * 1000:.2f}ms "
+            f"(control rig only: mean {controlOnly['mean'] * 1000:.2f}ms)",
+        )
+        return {"FINISHED"}
+
+    def profile(self, scene, controlRig, deformRig, action=None, frameStep=1):
+        previousFrame = scene.frame_current
+        previousAction = None
+        if action:
+            if controlRig.animation_data is None:
+                controlRig.animation_data_create()
+            previousAction = controlRig.animation_data.action
+            controlRig.animation_data.action = action
+            frameStart, frameEnd = [int(frame) for frame in action.frame_range]
+        else:
+            frameStart, frameEnd = scene.frame_start, scene.frame_end
+        frames = list(range(frameStart, frameEnd + 1, max(1, frameStep)))
+
+        meshObjs = [
+            obj
+            for obj in scene.objects
+            if obj.type == "MESH"
+            and any(mod.type == "ARMATURE" and mod.object in (controlRig, deformRig) for mod in obj.modifiers)
+        ]
+        deformMeshObjs = [
+            obj for obj in meshObjs if any(mod.type == "ARMATURE" and mod.object == deformRig for mod in obj.modifiers)
+        ]
+        correctiveNames = {
+            f"{helper.name}.{side}" for helper in GenerateRig.correctiveHelpers for side in ["L", "R"]
+        }
+
+        # Items that are muted to measure their share of the frame cost
+        attributionGroups = {
+            "COPY_SCALE (deform rig)": [
+                c for pb in deformRig.pose.bones for c in pb.constraints if c.type == "COPY_SCALE"
+            ],
+            "TRANSFORM (corrective helpers)": [
+                c
+                for pb in controlRig.pose.bones
+                if pb.name in correctiveNames
+                for c in pb.constraints
+                if c.type == "TRANSFORM"
+            ],
+            "COPY_LOCATION (root)": [
+                c for c in controlRig.pose.bones["root"].constraints if c.type == "COPY_LOCATION"
+            ]
+            if "root" in controlRig.pose.bones
+            else [],
+            "Shape key drivers": [
+                fcurve
+                for obj in meshObjs
+                if obj.data.shape_keys and obj.data.shape_keys.animation_data
+                for fcurve in obj.data.shape_keys.animation_data.drivers
+            ],
+        }
+
+        results = {"frames": len(frames), "passes": {}, "attribution": {}}
+        try:
+            results["passes"]["full"] = self.timeFrames(scene, frames)
+
+            # Bare control rig: take the deform rig and everything it deforms out of the depsgraph
+            hiddenObjs = [deformRig] + deformMeshObjs
+            hideStates = [obj.hide_viewport for obj in hiddenObjs]
+            for obj in hiddenObjs:
+                obj.hide_viewport = True
+            try:
+                results["passes"]["control_only"] = self.timeFrames(scene, frames)
+            finally:
+                for obj, hidden in zip(hiddenObjs, hideStates):
+                    obj.hide_viewport = hidden
+
+            for name, items in attributionGroups.items():
+                muteStates = [item.mute for item in items]
+                for item in items:
+                    item.mute = True
+                try:
+                    stats = self.timeFrames(scene, frames)
+                finally:
+                    for item, muted in zip(items, muteStates):
+                        item.mute = muted
+                results["attribution"][name] = {
+                    "count": len(items),
+                    "mean": results["passes"]["full"]["mean"] - stats["mean"],
+                }
+        finally:
+            if action:
+                controlRig.animation_data.action = previousAction
+            scene.frame_set(previousFrame)
+
+        return results
+
+    def timeFrames(self, scene, frames):
+        # Evaluate the first frame once so the timings don't include initial depsgraph building
+        scene.frame_set(frames[0])
+        times = []
+        for frame in frames:
+            start = time.perf_counter()
+            scene.frame_set(frame)
+            times.append(time.perf_counter() - start)
+
+        times.sort()
+        return {
+            "mean": sum(times) / len(times),
+            "p95": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "max": times[-1],
+            "total": sum(times),
+        }
+
+
+# Pose sampling helpers shared by baking and validation.
+# Blender stores matrices column major, so foreach_get results are transposed after reshaping.
+
+
+def readBoneRestMatrices(armature):
+    matrices = np.empty(len(armature.bones) * 16, dtype=np.float32)
+    armature.bones.foreach_get("matrix_local", matrices)
+    return matrices.reshape(-1, 4, 4).transpose(0, 2, 1)
+
+
+def readPoseMatrices(rigObj, depsgraph, out=None):
+    evaluatedRig = rigObj.evaluated_get(depsgraph)
+    if out is None:
+        out = np.empty((len(evaluatedRig.pose.bones), 4, 4), dtype=np.float32)
+    buffer = np.empty(out.size, dtype=np.float32)
+    evaluatedRig.pose.bones.foreach_get("matrix", buffer)
+    out[:] = buffer.reshape(-1, 4, 4).transpose(0, 2, 1)
+    return out
+
+
+# Per bone matrices that turn armature space pose matrices into local (basis) matrices:
+# basis = inverse(rest) @ parentRest @ inverse(parentPose) @ pose
+# In pose.bones order like readPoseMatrices, which need not match data.bones order, so rest matrices go by name.
+def getBasisConversion(rigObj):
+    poseBones = rigObj.pose.bones
+    restIndices = {bone.name: i for i, bone in enumerate(rigObj.data.bones)}
+    restMatrices = readBoneRestMatrices(rigObj.data)[[restIndices[poseBone.name] for poseBone in poseBones]]
+    poseIndices = {poseBone.name: i for i, poseBone in enumerate(poseBones)}
+    # Root bones use an extra identity "parent" at the end of the array
+    parentIndices = np.array(
+        [poseIndices[poseBone.parent.name] if poseBone.parent else len(poseBones) for poseBone in poseBones],
+        dtype=np.int64,
+    )
+    parentRest = np.concatenate([restMatrices, np.eye(4, dtype=np.float32)[None]])[parentIndices]
+    return np.linalg.inv(restMatrices) @ parentRest, parentIndices
+
+
+def poseToBasis(poseMatrices, conversion, parentIndices):
+    # poseMatrices is (frames, bones, 4, 4)
+    identity = np.broadcast_to(np.eye(4, dtype=poseMatrices.dtype), (poseMatrices.shape[0], 1, 4, 4))
+    parentPose = np.concatenate([poseMatrices, identity], axis=1)[:, parentIndices]
+    return conversion[None] @ np.linalg.inv(parentPose) @ poseMatrices
+
+
+# Split (..., 4, 4) matrices into location (..., 3), quaternion wxyz (..., 4) and scale (..., 3)
+def decomposeMatrices(matrices):
+    location = matrices[..., :3, 3]
+    scale = np.linalg.norm(matrices[..., :3, :3], axis=-2)
+    rotation = matrices[..., :3, :3] / np.maximum(scale[..., None, :], 1e-12)
+
+    # Shepperd's method: every candidate solves for one component from the diagonal and the others from the
+    # off-diagonal terms, the one with the largest diagonal term is well conditioned. Keeps the relative signs of
+    # x, y and z near 180 degrees, where w is about 0.
+    r = rotation
+    r00, r11, r22 = r[..., 0, 0], r[..., 1, 1], r[..., 2, 2]
+    diagonal = np.stack([r00 + r11 + r22, r00, r11, r22], axis=-1)
+    terms = np.stack([r00 + r11 + r22, r00 - r11 - r22, r11 - r00 - r22, r22 - r00 - r11], axis=-1)
+    s = 2 * np.sqrt(np.maximum(1e-12, 1 + terms))
+    wx, wy, wz = r[..., 2, 1] - r[..., 1, 2], r[..., 0, 2] - r[..., 2, 0], r[..., 1, 0] - r[..., 0, 1]
+    xy, xz, yz = r[..., 0, 1] + r[..., 1, 0], r[..., 0, 2] + r[..., 2, 0], r[..., 1, 2] + r[..., 2, 1]
+    candidates = np.stack(
+        [
+            np.stack([s[..., 0] / 4, wx / s[..., 0], wy / s[..., 0], wz / s[..., 0]], axis=-1),
+            np.stack([wx / s[..., 1], s[..., 1] / 4, xy / s[..., 1], xz / s[..., 1]], axis=-1),
+            np.stack([wy / s[..., 2], xy / s[..., 2], s[..., 2] / 4, yz / s[..., 2]], axis=-1),
+            np.stack([wz / s[..., 3], xz / s[..., 3], yz / s[..., 3], s[..., 3] / 4], axis=-1),
+        ],
+        axis=-2,
+    )
+    best = np.argmax(diagonal, axis=-1)[..., None, None]
+    quaternion = np.take_along_axis(candidates, best, axis=-2)[..., 0, :]
+    # Same sign convention as before, w >= 0
+    quaternion *= np.where(quaternion[..., :1] < 0, -1, 1)
+    quaternion /= np.linalg.norm(quaternion, axis=-1, keepdims=True)
+    return location, quaternion, scale
+
+
+# Flip quaternion signs along the frame axis (0) so consecutive frames take the short path
+def makeQuaternionsContinuous(quaternions):
+    dots = np.sum(quaternions[1:] * quaternions[:-1], axis=-1)
+    signs = np.cumprod(np.where(dots < 0, -1, 1), axis=0)
+    quaternions[1:] *= signs[..., None]
+    return quaternions
+
+
+# Drop keys that linear interpolation reproduces within tolerance
+def reduceKeyframes(frames, values, tolerance):
+    if np.ptp(values) <= tolerance:
+        return frames[:1], values[:1]
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:-1] = np.abs(values[1:-1] - (values[:-2] + values[2:]) / 2) > tolerance
+    # Dropping runs of keys can add up, so put back any key whose error is still too large
+    while True:
+        error = np.abs(np.interp(frames, frames[keep], values[keep]) - values)
+        missing = (error > tolerance) & ~keep
+        if not missing.any():
+            return frames[keep], values[keep]
+        keep |= missing
+
+
+def writeFCurve(action, dataPath, index, group, frames, values):
+    fcurve = action.fcurves.new(dataPath, index=index, action_group=group)
+    keyframePoints = fcurve.keyframe_points
+    keyframePoints.add(len(frames))
+    keyframePoints.foreach_set("co", np.column_stack([frames, values]).astype(np.float32).ravel())
+    keyframePoints.foreach_set("interpolation", np.full(len(frames), 1, dtype=np.int32))  # LINEAR
+    fcurve.update()
+    return fcurve
+
+
+def iterChunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+# Pose bone actions that were not made by baking, i.e. the ones animating the control rig
+def getControlRigActions():
+    return [
+        action
+        for action in bpy.data.actions
+        if "grt_baked_from" not in action
+        and any(fcurve.data_path.startswith("pose.bones[") for fcurve in action.fcurves)
+    ]
+
+
+# Position, rotation (degrees) and scale error between two sets of (..., 4, 4) matrices, stacked as (3, ...)
+def getTransformErrors(matricesA, matricesB):
+    locationA, quaternionA, scaleA = decomposeMatrices(matricesA)
+    locationB, quaternionB, scaleB = decomposeMatrices(matricesB)
+    position = np.linalg.norm(locationA - locationB, axis=-1)
+
+    # Angle of the relative rotation conj(a) * b, atan2 stays accurate for tiny angles where arccos does not
+    wA, vA = quaternionA[..., 0], quaternionA[..., 1:]
+    wB, vB = quaternionB[..., 0], quaternionB[..., 1:]
+    w = np.sum(quaternionA * quaternionB, axis=-1)
+    v = wA[..., None] * vB - wB[..., None] * vA - np.cross(vA, vB)
+    rotation = np.degrees(2 * np.arctan2(np.linalg.norm(v, axis=-1), np.abs(w)))
+
+    scale = np.abs(scaleA - scaleB).max(axis=-1)
+    return np.stack([position, rotation, scale])
+
+
+class BakeDeformActions(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Bakes actions from the GRT source (control) rig onto the GRT target (deform) rig. Each frame is evaluated once, all bone matrices are read in bulk and whole fcurves are written at once."
+    bl_idname = "object.bake_grt_deform_actions"
+    bl_label = "Bake Actions To GRT Rig"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    # Frames evaluated before their matrices are converted, bounds the size of the matrix buffer
+    frameBlockSize = 64
+
+    def execute(self, context):
+        GRTSettings = context.scene.GRT_Action_Bakery_Global_Settings
+        controlRig = GRTSettings.Source_Armature
+        deformRig = GRTSettings.Target_Armature
+        if controlRig is None or deformRig is None:
+            raise RuntimeError("GRT source/target armatures not set, generate a rig first.")
+
+        prop = context.scene.rigifyToGRTProperty
+        if prop.bakeAllActions:
+            actions = getControlRigActions()
+        elif controlRig.animation_data and controlRig.animation_data.action:
+            actions = [controlRig.animation_data.action]
+        else:
+            raise RuntimeError("Control rig has no action to bake.")
+
+        start = time.perf_counter()
+        keyCount = 0
+        bakedActions = []
+        # Only one action's channels are held at a time, so actions are simply baked in turn
+        for action in actions:
+            bakedAction, keys = self.bakeAction(
+                context, controlRig, deformRig, action, prop.bakeReduceKeys, prop.bakeTolerance
+            )
+            bakedActions.append(bakedAction)
+            keyCount += keys
+            print(f"Baked {len(bakedActions)}/{len(actions)} actions")
+
+        self.report(
+            {"INFO"},
+            f"Baked {len(bakedActions)} actions ({keyCount} keys) in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    def bakeAction(self, context, controlRig, deformRig, action, reduceKeys, tolerance):
+        scene = context.scene
+        frameStart, frameEnd = [int(frame) for frame in action.frame_range]
+        frames = np.arange(frameStart, frameEnd + 1, dtype=np.float32)
+        # pose.bones order, the order readPoseMatrices and getBasisConversion use
+        boneNames = [poseBone.name for poseBone in deformRig.pose.bones]
+        conversion, parentIndices = getBasisConversion(deformRig)
+
+        # loc (3) + quat (4) + scale (3) per bone per frame
+        channels = np.empty((len(frames), len(boneNames), 10), dtype=np.float32)
+
+        if controlRig.animation_data is None:
+            controlRig.animation_data_create()
+        previousAction = controlRig.animation_data.action
+        previousDeformAction = deformRig.animation_data.action if deformRig.animation_data else None
+        previousFrame = scene.frame_current
+        controlRig.animation_data.action = action
+        if previousDeformAction:
+            deformRig.animation_data.action = None
+
+        try:
+            poseBlock = np.empty((self.frameBlockSize, len(boneNames), 4, 4), dtype=np.float32)
+            for blockStart in range(0, len(frames), self.frameBlockSize):
+                blockFrames = frames[blockStart : blockStart + self.frameBlockSize]
+                for i, frame in enumerate(blockFrames):
+                    scene.frame_set(int(frame))
+                    readPoseMatrices(deformRig, context.evaluated_depsgraph_get(), poseBlock[i])
+
+                basis = poseToBasis(poseBlock[: len(blockFrames)], conversion, parentIndices)
+                location, quaternion, scale = decomposeMatrices(basis)
+                channels[blockStart : blockStart + len(blockFrames)] = np.concatenate(
+                    [location, quaternion, scale], axis=-1
+                )
+        finally:
+            controlRig.animation_data.action = previousAction
+            if previousDeformAction:
+                deformRig.animation_data.action = previousDeformAction
+            scene.frame_set(previousFrame)
+
+        channels[:, :, 3:7] = makeQuaternionsContinuous(channels[:, :, 3:7])
+
+        bakedName = f"{action.name}_GRT"
+        bakedAction = bpy.data.actions.get(bakedName)
+        if bakedAction is None:
+            bakedAction = bpy.data.actions.new(bakedName)
+        else:
+            bakedAction.fcurves.clear()
+        bakedAction["grt_baked_from"] = action.name
+        bakedAction["grt_baked_rig"] = deformRig.name
+        bakedAction.use_fake_user = True
+
+        keyCount = 0
+        for boneIndex, boneName in enumerate(boneNames):
+            for dataPath, offset, count in [("location", 0, 3), ("rotation_quaternion", 3, 4), ("scale", 7, 3)]:
+                for index in range(count):
+                    values = channels[:, boneIndex, offset + index]
+                    keyFrames = frames
+                    if reduceKeys:
+                        keyFrames, values = reduceKeyframes(frames, values, tolerance)
+                    writeFCurve(bakedAction, f'pose.bones["{boneName}"].{dataPath}', index, boneName, keyFrames, values)
+                    keyCount += len(keyFrames)
+
+        return bakedAction, keyCount
+
+
+class ValidateDeformRig(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Plays actions on the GRT source (control) rig and compares the world transform of every GRT target (deform) bone with the control rig bone of the same name. Reports the max and RMS position, rotation and scale error per bone, and fails when any bone is over the tolerances."
+    bl_idname = "object.validate_grt_deform_rig"
+    bl_label = "Validate GRT Rig Pose"
+    bl_options = {"REGISTER"}
+
+    # Frames evaluated before their errors are computed, bounds the size of the matrix buffers
+    frameBlockSize = 64
+    # Results of the last run, for scripts and the command line
+    lastResults = {}
+
+    def execute(self, context):
+        GRTSettings = context.scene.GRT_Action_Bakery_Global_Settings
+        controlRig = GRTSettings.Source_Armature
+        deformRig = GRTSettings.Target_Armature
+        if controlRig is None or deformRig is None:
+            raise RuntimeError("GRT source/target armatures not set, generate a rig first.")
+
+        prop = context.scene.rigifyToGRTProperty
+        if prop.validateAllActions:
+            actions = getControlRigActions()
+        elif prop.validateAction:
+            actions = [prop.validateAction]
+        else:
+            actions = []
+        tolerances = (prop.validatePositionTolerance, prop.validateRotationTolerance, prop.validateScaleTolerance)
+
+        start = time.perf_counter()
+        results = self.validate(context, controlRig, deformRig, actions, prop.validateFrameStep, tolerances)
+        ValidateDeformRig.lastResults = results
+
+        worstBones = sorted(results["bones"].items(), key=lambda item: -item[1]["position_max"])[:10]
+        for name, errors in worstBones:
+            print(
+                f"{name}: position max {errors['position_max']:.5f} rms {errors['position_rms']:.5f}, "
+                f"rotation max {errors['rotation_max']:.3f} rms {errors['rotation_rms']:.3f}, "
+                f"scale max {errors['scale_max']:.5f} rms {errors['scale_rms']:.5f}"
+            )
+        for name in results["failed_bones"]:
+            print(f"Over tolerance: {name}")
+
+        self.report(
+            {"INFO"} if results["passed"] else {"WARNING"},
+            f"{'Passed' if results['passed'] else 'Failed'}: {len(results['failed_bones'])} of {len(results['bones'])} bones "
+            f"over tolerance across {results['frames']} frames in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    def validate(self, context, controlRig, deformRig, actions, frameStep, tolerances):
+        scene = context.scene
+        controlIndices = {bone.name: i for i, bone in enumerate(controlRig.pose.bones)}
+        boneNames = [bone.name for bone in deformRig.pose.bones if bone.name in controlIndices]
+        controlSelect = np.array([controlIndices[name] for name in boneNames], dtype=np.int64)
+        deformSelect = np.array(
+            [i for i, bone in enumerate(deformRig.pose.bones) if bone.name in controlIndices], dtype=np.int64
+        )
+
+        controlPose = np.empty((len(controlRig.pose.bones), 4, 4), dtype=np.float32)
+        deformPose = np.empty((len(deformRig.pose.bones), 4, 4), dtype=np.float32)
+        controlBlock = np.empty((self.frameBlockSize, len(boneNames), 4, 4), dtype=np.float64)
+        deformBlock = np.empty_like(controlBlock)
+        maxErrors = np.zeros((3, len(boneNames)))
+        sumSquares = np.zeros((3, len(boneNames)))
+        frameCount = 0
+
+        if controlRig.animation_data is None:
+            controlRig.animation_data_create()
+        previousAction = controlRig.animation_data.action
+        previousDeformAction = deformRig.animation_data.action if deformRig.animation_data else None
+        previousFrame = scene.frame_current
+        # The deform rig has to follow its constraints, not a baked action
+        if previousDeformAction:
+            deformRig.animation_data.action = None
+
+        try:
+            for action in actions or [None]:
+                if action:
+                    controlRig.animation_data.action = action
+                    frameStart, frameEnd = [int(frame) for frame in action.frame_range]
+                else:
+                    frameStart, frameEnd = scene.frame_start, scene.frame_end
+                frames = list(range(frameStart, frameEnd + 1, frameStep))
+
+                for blockFrames in iterChunks(frames, self.frameBlockSize):
+                    for i, frame in enumerate(blockFrames):
+                        scene.frame_set(frame)
+                        depsgraph = context.evaluated_depsgraph_get()
+                        readPoseMatrices(controlRig, depsgraph, controlPose)
+                        readPoseMatrices(deformRig, depsgraph, deformPose)
+                        controlWorld = np.array(controlRig.evaluated_get(depsgraph).matrix_world)
+                        deformWorld = np.array(deformRig.evaluated_get(depsgraph).matrix_world)
+                        controlBlock[i] = controlWorld @ controlPose[controlSelect]
+                        deformBlock[i] = deformWorld @ deformPose[deformSelect]
+
+                    errors = getTransformErrors(controlBlock[: len(blockFrames)], deformBlock[: len(blockFrames)])
+                    np.maximum(maxErrors, errors.max(axis=1), out=maxErrors)
+                    sumSquares += np.square(errors).sum(axis=1)
+                    frameCount += len(blockFrames)
+        finally:
+            controlRig.animation_data.action = previousAction
+            if previousDeformAction:
+                deformRig.animation_data.action = previousDeformAction
+            scene.frame_set(previousFrame)
+
+        rmsErrors = np.sqrt(sumSquares / max(frameCount, 1))
+        failed = (maxErrors > np.array(tolerances)[:, None]).any(axis=0)
+        bones = {}
+        for i, name in enumerate(boneNames):
+            bones[name] = {}
+            for row, kind in enumerate(["position", "rotation", "scale"]):
+                bones[name][f"{kind}_max"] = float(maxErrors[row, i])
+                bones[name][f"{kind}_rms"] = float(rmsErrors[row, i])
+
+        return {
+            "frames": frameCount,
+            "actions": [action.name for action in actions],
+            "tolerances": {"position": tolerances[0], "rotation": tolerances[1], "scale": tolerances[2]},
+            "bones": bones,
+            "failed_bones": [name for name, isFailed in zip(boneNames, failed.tolist()) if isFailed],
+            "passed": not failed.any(),
+        }
+
+
+class BakeShapeKeyDrivers(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Evaluates the shape key drivers on the selected meshes over the frame range of the bake action (played on the GRT source rig) or the scene, and writes the values as shape key animation. Drivers can be muted afterwards for driver-free playback and morph target export."
+    bl_idname = "object.bake_shape_key_drivers"
+    bl_label = "Bake Shape Key Drivers"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    def execute(self, context):
+        scene = context.scene
+        prop = scene.rigifyToGRTProperty
+
+        # Driven shape keys per mesh: (object, key, [key block index], [shape key name])
+        meshes = []
+        for obj in context.selected_objects:
+            if obj.type != "MESH" or obj.data.shape_keys is None or obj.data.shape_keys.animation_data is None:
+                continue
+            shapeKeys = obj.data.shape_keys
+            keyIndices = {keyBlock.name: i for i, keyBlock in enumerate(shapeKeys.key_blocks)}
+            names = [
+                name
+                for name in map(TransferShapeKeyDrivers.getShapeKeyNameFromDriver, shapeKeys.animation_data.drivers)
+                if name in keyIndices
+            ]
+            if names:
+                meshes.append((obj, shapeKeys, [keyIndices[name] for name in names], names))
+        if not meshes:
+            self.report({"ERROR"}, "No selected mesh has shape key drivers.")
+            return {"FINISHED"}
+
+        action = prop.shapeKeyBakeAction
+        controlRig = scene.GRT_Action_Bakery_Global_Settings.Source_Armature
+        if action and controlRig is None:
+            raise RuntimeError("GRT source armature not set, generate a rig first.")
+
+        start = time.perf_counter()
+        previousFrame = scene.frame_current
+        if action:
+            if controlRig.animation_data is None:
+                controlRig.animation_data_create()
+            previousAction = controlRig.animation_data.action
+            controlRig.animation_data.action = action
+            frameStart, frameEnd = [int(frame) for frame in action.frame_range]
+        else:
+            frameStart, frameEnd = scene.frame_start, scene.frame_end
+        frames = np.arange(frameStart, frameEnd + 1, dtype=np.float32)
+
+        # Sample the drivers, not the curves of an earlier bake: unmute them and take the shape key action off
+        previousKeyStates = []
+        for obj, key, indices, names in meshes:
+            nameSet = set(names)
+            fcurves = [
+                fcurve
+                for fcurve in key.animation_data.drivers
+                if TransferShapeKeyDrivers.getShapeKeyNameFromDriver(fcurve) in nameSet
+            ]
+            previousKeyStates.append((key.animation_data.action, [(fcurve, fcurve.mute) for fcurve in fcurves]))
+            key.animation_data.action = None
+            for fcurve in fcurves:
+                fcurve.mute = False
+
+        # One frame_set per frame, every mesh's key values read in bulk
+        values = [np.empty((len(frames), len(indices)), dtype=np.float32) for obj, key, indices, names in meshes]
+        buffers = [np.empty(len(key.key_blocks), dtype=np.float32) for obj, key, indices, names in meshes]
+        try:
+            for frameIndex, frame in enumerate(frames):
+                scene.frame_set(int(frame))
+                depsgraph = context.evaluated_depsgraph_get()
+                for (obj, key, indices, names), meshValues, buffer in zip(meshes, values, buffers):
+                    key.evaluated_get(depsgraph).key_blocks.foreach_get("value", buffer)
+                    meshValues[frameIndex] = buffer[indices]
+        except Exception:
+            for (obj, key, indices, names), (keyAction, muteStates) in zip(meshes, previousKeyStates):
+                key.animation_data.action = keyAction
+                for fcurve, mute in muteStates:
+                    fcurve.mute = mute
+            raise
+        finally:
+            if action:
+                controlRig.animation_data.action = previousAction
+            scene.frame_set(previousFrame)
+
+        keyCount = 0
+        for (obj, key, indices, names), meshValues, (keyAction, muteStates) in zip(meshes, values, previousKeyStates):
+            bakedName = f"{obj.name}_{action.name if action else scene.name}_ShapeKeys"
+            bakedAction = bpy.data.actions.get(bakedName)
+            if bakedAction is None:
+                bakedAction = bpy.data.actions.new(bakedName)
+            else:
+                bakedAction.fcurves.clear()
+
+            for i, name in enumerate(names):
+                keyFrames, keyValues = frames, meshValues[:, i]
+                if prop.bakeReduceKeys:
+                    keyFrames, keyValues = reduceKeyframes(frames, keyValues, prop.bakeTolerance)
+                writeFCurve(bakedAction, f'key_blocks["{name}"].value', 0, "Shape Keys", keyFrames, keyValues)
+                keyCount += len(keyFrames)
+
+            key.animation_data.action = bakedAction
+            for fcurve, mute in muteStates:
+                fcurve.mute = True if prop.muteBakedDrivers else mute
+
+        self.report(
+            {"INFO"},
+            f"Baked {sum(len(names) for obj, key, indices, names in meshes)} shape keys on {len(meshes)} meshes "
+            f"({keyCount} keys) in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
+# Per shape key of the mesh: the largest vertex offset it applies and the number of vertices it moves further than
+# threshold. Blender blends each key as value * (key - relative key), so that is the delta measured. Also returns the
+# mask of vertices moved by any key. There is no bulk accessor across key blocks, so coordinates are read with one
+# foreach_get per key, and kept only for keys that other keys are relative to.
+def getShapeKeyDeltas(mesh, threshold):
+    keyBlocks = mesh.shape_keys.key_blocks
+    vertexCount = len(mesh.vertices)
+    relativeNames = {keyBlock.relative_key.name for keyBlock in keyBlocks}
+    cache = {}
+    buffer = np.empty(vertexCount * 3, dtype=np.float32)
+
+    def readCoordinates(keyBlock):
+        coordinates = cache.get(keyBlock.name)
+        if coordinates is None:
+            # Keys nothing is relative to go into the shared buffer, the next key overwrites them
+            isRelative = keyBlock.name in relativeNames
+            coordinates = np.empty(vertexCount * 3, dtype=np.float32) if isRelative else buffer
+            keyBlock.data.foreach_get("co", coordinates)
+            coordinates = coordinates.reshape(-1, 3)
+            if isRelative:
+                cache[keyBlock.name] = coordinates
+        return coordinates
+
+    maxDeltas = np.zeros(len(keyBlocks), dtype=np.float32)
+    affectedCounts = np.zeros(len(keyBlocks), dtype=np.int64)
+    affected = np.zeros(vertexCount, dtype=bool)
+    thresholdSquared = threshold * threshold
+    for i, keyBlock in enumerate(keyBlocks):
+        # The basis, and any key relative to itself, never moves anything
+        if keyBlock.relative_key == keyBlock:
+            continue
+        deltas = readCoordinates(keyBlock) - readCoordinates(keyBlock.relative_key)
+        distancesSquared = np.einsum("ij,ij->i", deltas, deltas)
+        moved = distancesSquared > thresholdSquared
+        maxDeltas[i] = np.sqrt(distancesSquared.max(initial=0))
+        affectedCounts[i] = np.count_nonzero(moved)
+        affected |= moved
+    return maxDeltas, affectedCounts, affected
+
+
+class PruneShapeKeys(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Measures how far each shape key on the selected meshes moves vertices from its relative key and reports the affected vertex counts per mesh. Optionally deletes shape keys that move no vertex further than the threshold, together with their drivers, so they are not exported as morph targets."
+    bl_idname = "object.prune_grt_shape_keys"
+    bl_label = "Prune Shape Keys"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    # Results of the last run, for scripts
+    lastResults = {}
+
+    def execute(self, context):
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        prop = context.scene.rigifyToGRTProperty
+        start = time.perf_counter()
+
+        results = {}
+        for obj in context.selected_objects:
+            if obj.type != "MESH" or obj.data.shape_keys is None:
+                continue
+            results[obj.name] = self.prune(obj, prop.shapeKeyPruneThreshold, prop.shapeKeyPruneDelete)
+        PruneShapeKeys.lastResults = results
+
+        for name, result in results.items():
+            print(
+                f"{name}: {result['shape_keys']} shape keys, {len(result['unused'])} under threshold, "
+                f"{result['affected_vertices']}/{result['vertices']} vertices affected"
+            )
+            for shapeKeyName in result["unused"]:
+                print(f"    {'Removed' if prop.shapeKeyPruneDelete else 'Unused'}: {shapeKeyName}")
+
+        unusedCount = sum(len(result["unused"]) for result in results.values())
+        self.report(
+            {"INFO"},
+            f"{unusedCount} of {sum(result['shape_keys'] for result in results.values())} shape keys on "
+            f"{len(results)} meshes under threshold{' and removed' if prop.shapeKeyPruneDelete else ''} "
+            f"in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    # Returns counts for the mesh and the names of the keys under the threshold, which are removed if delete is set.
+    # The basis and keys other keys are relative to are never removed.
+    @staticmethod
+    def prune(obj, threshold, delete):
+        shapeKeys = obj.data.shape_keys
+        keyBlocks = shapeKeys.key_blocks
+        maxDeltas, affectedCounts, affected = getShapeKeyDeltas(obj.data, threshold)
+
+        relativeKeyNames = {
+            keyBlock.relative_key.name for keyBlock in keyBlocks if keyBlock.relative_key != keyBlock
+        }
+        relativeKeyNames.add(shapeKeys.reference_key.name)
+        keyStats = {
+            keyBlock.name: {"max_delta": delta, "affected_vertices": count}
+            for keyBlock, delta, count in zip(keyBlocks, maxDeltas.tolist(), affectedCounts.tolist())
+        }
+        unusedNames = [
+            name for name, stats in keyStats.items() if stats["affected_vertices"] == 0 and name not in relativeKeyNames
+        ]
+
+        if delete and unusedNames:
+            # Drivers first, they would be left pointing at missing key blocks otherwise
+            unusedSet = set(unusedNames)
+            if shapeKeys.animation_data:
+                drivers = shapeKeys.animation_data.drivers
+                for fcurve in list(drivers):
+                    match = re.match(r"key\_blocks\[\"(.*)\"\]\.", fcurve.data_path)
+                    if match and match.group(1) in unusedSet:
+                        drivers.remove(fcurve)
+            for name in unusedNames:
+                obj.shape_key_remove(keyBlocks[name])
+
+        return {
+            "shape_keys": len(keyStats),
+            "vertices": len(affected),
+            "affected_vertices": int(np.count_nonzero(affected)),
+            "keys": keyStats,
+            "unused": unusedNames,
+        }
+
+
+# Deform weights as flat (vertex, group, weight) arrays.
+# Blender has no bulk accessor for vertex group weights, so this is a single Python pass and everything after it is NumPy.
+def readVertexWeights(mesh):
+    counts = np.fromiter((len(vertex.groups) for vertex in mesh.vertices), dtype=np.int64, count=len(mesh.vertices))
+    influences = [(element.group, element.weight) for vertex in mesh.vertices for element in vertex.groups]
+    influences = np.array(influences, dtype=np.float64).reshape(-1, 2)
+    vertices = np.repeat(np.arange(len(mesh.vertices)), counts)
+    return vertices, influences[:, 0].astype(np.int64), influences[:, 1].astype(np.float32)
+
+
+# Returns which influences to keep and their new weights.
+# Only influences in deformMask are limited, pruned and normalised, other groups are left alone.
+# The strongest influence of a vertex is always kept so no vertex loses all of its weights.
+def limitVertexWeights(vertices, weights, deformMask, maxInfluences, threshold, normalize):
+    keep = np.ones(len(weights), dtype=bool)
+    newWeights = weights.copy()
+
+    deformIndices = np.flatnonzero(deformMask)
+    deformVertices = vertices[deformIndices]
+    deformWeights = weights[deformIndices]
+
+    # Rank influences per vertex, strongest first
+    order = np.lexsort((-deformWeights, deformVertices))
+    sortedVertices = deformVertices[order]
+    segmentStarts = np.r_[0, np.flatnonzero(np.diff(sortedVertices)) + 1]
+    segmentLengths = np.diff(np.r_[segmentStarts, len(sortedVertices)])
+    ranks = np.arange(len(sortedVertices)) - np.repeat(segmentStarts, segmentLengths)
+
+    sortedKeep = (ranks < maxInfluences) & ((deformWeights[order] >= threshold) | (ranks == 0))
+    keep[deformIndices[order]] = sortedKeep
+
+    if normalize:
+        keptIndices = deformIndices[order][sortedKeep]
+        totals = np.bincount(vertices[keptIndices], weights=weights[keptIndices], minlength=vertices.max() + 1)
+        vertexTotals = totals[vertices[keptIndices]]
+        newWeights[keptIndices] = np.where(
+            vertexTotals > 0, weights[keptIndices] / np.maximum(vertexTotals, 1e-12), weights[keptIndices]
+        )
+
+    return keep, newWeights
+
+
+class CleanupSkinWeights(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Limits the number of deform bone influences per vertex on the selected meshes, prunes near-zero weights and renormalises, so Unreal does not truncate them on import."
+    bl_idname = "object.cleanup_skin_weights"
+    bl_label = "Clean Up Skin Weights"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    def execute(self, context):
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        prop = context.scene.rigifyToGRTProperty
+        maxInfluences = int(prop.weightMaxInfluences)
+        start = time.perf_counter()
+
+        meshCount = removedCount = changedCount = 0
+        for obj in context.selected_objects:
+            rigObjs = [mod.object for mod in obj.modifiers if mod.type == "ARMATURE" and mod.object]
+            if obj.type != "MESH" or not rigObjs or not obj.vertex_groups:
+                continue
+
+            deformNames = {bone.name for rigObj in rigObjs for bone in rigObj.data.bones if bone.use_deform}
+            deformGroups = np.array([group.name in deformNames for group in obj.vertex_groups], dtype=bool)
+
+            vertices, groups, weights = readVertexWeights(obj.data)
+            if len(weights) == 0:
+                continue
+            keep, newWeights = limitVertexWeights(
+                vertices, weights, deformGroups[groups], maxInfluences, prop.weightPruneThreshold, prop.weightNormalize
+            )
+
+            # Write back weights that changed first, while every influence still exists
+            changed = np.flatnonzero(keep & (np.abs(newWeights - weights) > 1e-6))
+            changedWeights = {
+                (vertex, group): weight
+                for vertex, group, weight in zip(
+                    vertices[changed].tolist(), groups[changed].tolist(), newWeights[changed].tolist()
+                )
+            }
+            meshVertices = obj.data.vertices
+            for vertex in np.unique(vertices[changed]).tolist():
+                for element in meshVertices[vertex].groups:
+                    weight = changedWeights.get((vertex, element.group))
+                    if weight is not None:
+                        element.weight = weight
+
+            # Then remove pruned influences, one call per vertex group
+            removed = np.flatnonzero(~keep)
+            removedGroups = groups[removed]
+            removedVertices = vertices[removed]
+            for group in np.unique(removedGroups).tolist():
+                obj.vertex_groups[group].remove(removedVertices[removedGroups == group].tolist())
+
+            meshCount += 1
+            removedCount += len(removed)
+            changedCount += len(changed)
+
+        self.report(
+            {"INFO"},
+            f"Cleaned {meshCount} meshes: {removedCount} influences removed, {changedCount} reweighted "
+            f"in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
+class PruneDeformBones(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Finds deform bones on the GRT target rig that no skinned mesh is weighted to and that are not needed as ancestors, driver targets, constraint targets or object parents. These are reported, made non-deforming or deleted."
+    bl_idname = "object.prune_grt_deform_bones"
+    bl_label = "Prune Unused Deform Bones"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    def execute(self, context):
+        rigObj = context.scene.GRT_Action_Bakery_Global_Settings.Target_Armature
+        if rigObj is None:
+            raise RuntimeError("GRT target armature not set, generate a rig first.")
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        prop = context.scene.rigifyToGRTProperty
+        start = time.perf_counter()
+        bones = rigObj.data.bones
+        deformBefore = sum(1 for bone in bones if bone.use_deform)
+
+        neededNames = {"root"} | self.getWeightedBones(rigObj, prop.pruneWeightThreshold) | self.getReferencedBones(rigObj)
+        # Ancestors of needed bones have to stay for the hierarchy
+        for name in list(neededNames):
+            if name in bones:
+                neededNames.update(parent.name for parent in bones[name].parent_recursive)
+
+        unusedNames = [bone.name for bone in bones if bone.use_deform and bone.name not in neededNames]
+        for name in unusedNames:
+            print(f"Unused deform bone: {name}")
+
+        if prop.pruneMode == "Undeform":
+            for name in unusedNames:
+                bones[name].use_deform = False
+        elif prop.pruneMode == "Delete" and unusedNames:
+            bpy.ops.object.select_all(action="DESELECT")
+            rigObj.hide_set(False)
+            rigObj.select_set(True)
+            bpy.context.view_layer.objects.active = rigObj
+            bpy.ops.object.mode_set(mode="EDIT")
+            editBones = rigObj.data.edit_bones
+            for name in unusedNames:
+                editBones.remove(editBones[name])
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        if prop.pruneMode == "Report":
+            deformAfter = deformBefore - len(unusedNames)
+        else:
+            deformAfter = sum(1 for bone in rigObj.data.bones if bone.use_deform)
+        self.report(
+            {"INFO"},
+            f"{len(unusedNames)} unused deform bones ({prop.pruneMode}). Deform bones: {deformBefore} -> {deformAfter} "
+            f"in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+    # Bones with a weight above the threshold on any mesh skinned to the rig
+    def getWeightedBones(self, rigObj, threshold):
+        weightedNames = set()
+        for obj in bpy.data.objects:
+            if obj.type != "MESH" or not obj.vertex_groups:
+                continue
+            if not any(mod.type == "ARMATURE" and mod.object == rigObj for mod in obj.modifiers):
+                continue
+            vertices, groups, weights = readVertexWeights(obj.data)
+            for group in np.unique(groups[weights > threshold]).tolist():
+                weightedNames.add(obj.vertex_groups[group].name)
+        return weightedNames
+
+    # Bones used by drivers, constraints on other objects and bone parenting
+    def getReferencedBones(self, rigObj):
+        referencedNames = set()
+        for idData, fcurve in AuditDrivers.getAllDrivers():
+            for driverVar in fcurve.driver.variables:
+                for target in driverVar.targets:
+                    if target.id == rigObj and target.bone_target:
+                        referencedNames.add(target.bone_target)
+
+        for obj in bpy.data.objects:
+            if obj == rigObj:
+                continue
+            if obj.parent == rigObj and obj.parent_type == "BONE":
+                referencedNames.add(obj.parent_bone)
+            constraints = list(obj.constraints)
+            if obj.pose:
+                constraints += [constraint for poseBone in obj.pose.bones for constraint in poseBone.constraints]
+            for constraint in constraints:
+                if constraint.type == "ARMATURE":
+                    referencedNames.update(
+                        target.subtarget for target in constraint.targets if target.target == rigObj
+                    )
+                elif getattr(constraint, "target", None) == rigObj and getattr(constraint, "subtarget", ""):
+                    referencedNames.add(constraint.subtarget)
+        return referencedNames
+
+
+# FBX export helpers, shared by the export operator and the parallel exporter in cli.py.
+# Every exported file is keyed by a content hash so unchanged files can be skipped.
+
+fbxCommonSettings = {
+    "use_selection": True,
+    "add_leaf_bones": False,
+    "primary_bone_axis": "Y",
+    "secondary_bone_axis": "X",
+    "use_armature_deform_only": True,
+}
+
+fbxSkeletalMeshSettings = {
+    **fbxCommonSettings,
+    "object_types": {"ARMATURE", "MESH"},
+    "mesh_smooth_type": "FACE",
+    "bake_anim": False,
+}
+
+fbxActionSettings = {
+    **fbxCommonSettings,
+    "object_types": {"ARMATURE"},
+    "bake_anim": True,
+    "bake_anim_use_all_actions": False,
+    "bake_anim_use_nla_strips": False,
+    "bake_anim_force_startend_keying": True,
+    "bake_anim_simplify_factor": 0.0,
+}
+
+
+# Sets are sorted so the key is the same in every process
+def getExportSettingsKey(settings):
+    return repr(sorted((key, sorted(value) if isinstance(value, set) else value) for key, value in settings.items()))
+
+
+def hashCollection(fingerprint, collection, attribute, size, dtype=np.float32):
+    values = np.empty(len(collection) * size, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    fingerprint.update(values.tobytes())
+
+
+def getRigFingerprint(rigObj):
+    fingerprint = hashlib.sha256()
+    bones = rigObj.data.bones
+    fingerprint.update(
+        repr([(bone.name, bone.parent.name if bone.parent else None, bone.use_deform) for bone in bones]).encode()
+    )
+    fingerprint.update(readBoneRestMatrices(rigObj.data).tobytes())
+    fingerprint.update(np.array(rigObj.matrix_world, dtype=np.float32).tobytes())
+    return fingerprint.hexdigest()
+
+
+def getSkinnedMeshes(rigObj):
+    return [
+        obj
+        for obj in bpy.context.scene.objects
+        if obj.type == "MESH" and any(mod.type == "ARMATURE" and mod.object == rigObj for mod in obj.modifiers)
+    ]
+
+
+def getSkeletalMeshHash(rigFingerprint, meshObjs):
+    fingerprint = hashlib.sha256(rigFingerprint.encode())
+    fingerprint.update(getExportSettingsKey(fbxSkeletalMeshSettings).encode())
+    for obj in sorted(meshObjs, key=lambda obj: obj.name):
+        mesh = obj.data
+        fingerprint.update(
+            repr(
+                (obj.name, [group.name for group in obj.vertex_groups], [slot.name for slot in obj.material_slots])
+            ).encode()
+        )
+        fingerprint.update(np.array(obj.matrix_world, dtype=np.float32).tobytes())
+        hashCollection(fingerprint, mesh.vertices, "co", 3)
+        hashCollection(fingerprint, mesh.loops, "vertex_index", 1, np.int32)
+        hashCollection(fingerprint, mesh.polygons, "loop_total", 1, np.int32)
+        for uvLayer in mesh.uv_layers:
+            hashCollection(fingerprint, uvLayer.data, "uv", 2)
+        for array in readVertexWeights(mesh):
+            fingerprint.update(array.tobytes())
+        if mesh.shape_keys:
+            for keyBlock in mesh.shape_keys.key_blocks:
+                fingerprint.update(keyBlock.name.encode())
+                hashCollection(fingerprint, keyBlock.data, "co", 3)
+    return fingerprint.hexdigest()
+
+
+def getActionHash(rigFingerprint, action):
+    fingerprint = hashlib.sha256(rigFingerprint.encode())
+    fingerprint.update(getExportSettingsKey(fbxActionSettings).encode())
+    fingerprint.update(np.array(action.frame_range, dtype=np.float32).tobytes())
+    for fcurve in sorted(action.fcurves, key=lambda fcurve: (fcurve.data_path, fcurve.array_index)):
+        fingerprint.update(repr((fcurve.data_path, fcurve.array_index, fcurve.mute)).encode())
+        keyframePoints = fcurve.keyframe_points
+        for attribute in ["co", "handle_left", "handle_right"]:
+            hashCollection(fingerprint, keyframePoints, attribute, 2)
+        hashCollection(fingerprint, keyframePoints, "interpolation", 1, np.int32)
+    return fingerprint.hexdigest()
+
+
+# Actions baked onto the deform rig. If nothing was baked for it, the actions it plays (active and NLA), or failing
+# that every action animating its bones that was not baked for another rig.
+def getExportActions(rigObj):
+    bakedActions = [action for action in bpy.data.actions if action.get("grt_baked_rig") == rigObj.name]
+    if bakedActions:
+        return bakedActions
+
+    animationData = rigObj.animation_data
+    if animationData:
+        usedActions = [animationData.action] if animationData.action else []
+        usedActions += [
+            strip.action for track in animationData.nla_tracks for strip in track.strips if strip.action
+        ]
+        if usedActions:
+            return list(dict.fromkeys(usedActions))
+
+    bonePaths = {f'pose.bones["{bone.name}"]' for bone in rigObj.data.bones}
+    return [
+        action
+        for action in bpy.data.actions
+        if action.get("grt_baked_rig", rigObj.name) == rigObj.name
+        and any(fcurve.data_path.split("].")[0] + "]" in bonePaths for fcurve in action.fcurves)
+    ]
+
+
+def getExportFileName(prefix, name):
+    return prefix + re.sub(r"[^\w\-.]", "_", name) + ".fbx"
+
+
+# Lists every file the rig exports to, with its content hash and whether it differs from the last export
+def getExportPlan(rigObj, directory, force=False):
+    manifest = readExportManifest(directory)
+    previousFiles = manifest.get("files", {}) if manifest.get("rig") == rigObj.name else {}
+    rigFingerprint = getRigFingerprint(rigObj)
+
+    meshHash = getSkeletalMeshHash(rigFingerprint, getSkinnedMeshes(rigObj))
+    entries = [("skeletal_mesh", rigObj.name, getExportFileName("SK_", rigObj.name), meshHash)]
+    entries += [
+        ("action", action.name, getExportFileName("A_", action.name), getActionHash(rigFingerprint, action))
+        for action in getExportActions(rigObj)
+    ]
+
+    files = {}
+    for kind, name, fileName, contentHash in entries:
+        changed = (
+            force
+            or previousFiles.get(fileName, {}).get("hash") != contentHash
+            or not os.path.exists(os.path.join(directory, fileName))
+        )
+        files[fileName] = {"kind": kind, "name": name, "hash": contentHash, "changed": changed}
+    return {"rig": rigObj.name, "rig_fingerprint": rigFingerprint, "files": files}
+
+
+def selectForExport(objs):
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    bpy.ops.object.select_all(action="DESELECT")
+    for obj in objs:
+        obj.hide_set(False)
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = objs[0]
+
+
+def exportSkeletalMesh(rigObj, filepath):
+    selectForExport([rigObj] + getSkinnedMeshes(rigObj))
+    bpy.ops.export_scene.fbx(filepath=filepath, **fbxSkeletalMeshSettings)
+
+
+def exportAction(rigObj, action, filepath):
+    scene = bpy.context.scene
+    if rigObj.animation_data is None:
+        rigObj.animation_data_create()
+    previousAction = rigObj.animation_data.action
+    previousRange = (scene.frame_start, scene.frame_end)
+
+    # The deform rig's constraints follow the control rig, mute them so the exporter samples the baked action
+    constraintMutes = [
+        (constraint, constraint.mute) for poseBone in rigObj.pose.bones for constraint in poseBone.constraints
+    ]
+
+    selectForExport([rigObj])
+    rigObj.animation_data.action = action
+    # The exporter bakes the scene frame range. Start is set first, so the range never ends up inverted.
+    scene.frame_start, scene.frame_end = [int(frame) for frame in action.frame_range]
+    try:
+        for constraint, mute in constraintMutes:
+            constraint.mute = True
+        bpy.ops.export_scene.fbx(filepath=filepath, **fbxActionSettings)
+    finally:
+        for constraint, mute in constraintMutes:
+            constraint.mute = mute
+        rigObj.animation_data.action = previousAction
+        scene.frame_start, scene.frame_end = previousRange
+
+
+# Exports the given plan entries, returning the time taken and any error per file
+def exportFiles(rigObj, directory, entries):
+    os.makedirs(directory, exist_ok=True)
+    results = {}
+    for fileName, entry in entries.items():
+        filepath = os.path.join(directory, fileName)
+        start = time.perf_counter()
+        try:
+            if entry["kind"] == "skeletal_mesh":
+                exportSkeletalMesh(rigObj, filepath)
+            else:
+                exportAction(rigObj, bpy.data.actions[entry["name"]], filepath)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Failed to export {fileName}: {error}")
+        results[fileName] = {"seconds": time.perf_counter() - start, "error": error}
+    return results
+
+
+class ExportGRTFBX(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Exports the GRT target rig with its skinned meshes, then each baked action as its own FBX. Files whose content has not changed since the last export are skipped. Use cli.py export to spread the files across several Blender processes."
+    bl_idname = "object.export_grt_fbx"
+    bl_label = "Export GRT Rig To FBX"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        rigObj = context.scene.GRT_Action_Bakery_Global_Settings.Target_Armature
+        if rigObj is None:
+            raise RuntimeError("GRT target armature not set, generate a rig first.")
+
+        prop = context.scene.rigifyToGRTProperty
+        directory = bpy.path.abspath(prop.exportDirectory)
+        start = time.perf_counter()
+
+        plan = getExportPlan(rigObj, directory, prop.exportForce)
+        changed = {fileName: entry for fileName, entry in plan["files"].items() if entry["changed"]}
+        results = exportFiles(rigObj, directory, changed)
+        writeExportManifest(directory, plan, results)
+
+        failed = [fileName for fileName, result in results.items() if result["error"]]
+        self.report(
+            {"WARNING"} if failed else {"INFO"},
+            f"Exported {len(results) - len(failed)} files, skipped {len(plan['files']) - len(changed)} unchanged, "
+            f"{len(failed)} failed in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
+class ReloadDriverPresets(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Reloads the shape key driver presets from the presets folder."
+    bl_idname = "object.reload_driver_presets"
+    bl_label = "Reload Driver Presets"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        errors = loadDriverPresets()
+        for error in errors:
+            self.report({"WARNING"}, error)
+        self.report({"INFO"}, f"Loaded {len(driverPresets)} driver presets, {len(errors)} files failed")
+        return {"FINISHED"}
+
+
+class PurgeGenerationData(bpy.types.Operator):
+    # set bl_ properties
+    bl_description = "Removes control rigs, deform rigs and armature data left over from earlier GenerateRig runs that nothing uses anymore, and reports how many datablocks were removed with a rough size estimate."
+    bl_idname = "object.purge_grt_generations"
+    bl_label = "Purge Old Generated Data"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        start = time.perf_counter()
+        freed = purgeGenerationData()
+        self.report(
+            {"INFO"},
+            f"Removed {freed['objects']} objects and {freed['armatures']} armatures "
+            f"(roughly {freed['estimated_bytes'] / 1024:.0f} KB by estimate) in {time.perf_counter() - start:.2f}s",
+        )
+        return {"FINISHED"}
+
+
 class ToolsPanel(bpy.types.Panel):
     bl_idname = "RIGIFY_GRT_PT_global_tools"
     bl_label = "Unreal Rigify To GRT"
@@ -562,16 +2825,69 @@ class ToolsPanel(bpy.types.Panel):
         prop = bpy.context.scene.rigifyToGRTProperty
         generateRig = col.operator(GenerateRig.bl_idname)
         prop_split(col, prop, "shapeKeyRig", "Add-on Rig")
+        prop_split(col, prop, "copyScaleMode", "Copy Scale")
+        col.prop(prop, "forceFullRegenerate")
         col.label(text="Make sure all add-on bones are deformable.")
+        col.operator(UpdateAddonRig.bl_idname)
+        col.operator(PurgeGenerationData.bl_idname)
 
         transferShapeKeyDrivers = col.operator(TransferShapeKeyDrivers.bl_idname)
         prop_split(col, prop, "rigObj", "New Driver Target")
+        col.prop(prop, "syncDrivers")
+        col.prop(prop, "removeStaleDrivers")
 
         shape_key_prop = bpy.context.scene.shapeKeySetupProperty
         col.operator(SetupShapekeyDriver.bl_idname)
         prop_split(col, shape_key_prop, "shapeKeyType", "Shapekey Category")
+        col.operator(ReloadDriverPresets.bl_idname)
+        col.prop(shape_key_prop, "searchAllSkinnedMeshes")
         
         col.operator(UpdateArmatureReferences.bl_idname)
+        prop_split(col, prop, "rebindOldRig", "Old Armature")
+        prop_split(col, prop, "rebindScope", "Scope")
+        col.prop(prop, "rebindDryRun")
+
+        col.operator(AuditDrivers.bl_idname)
+        col.prop(prop, "rewriteSlowDrivers")
+
+        col.operator(BakeDeformActions.bl_idname)
+        col.prop(prop, "bakeAllActions")
+        col.prop(prop, "bakeReduceKeys")
+        if prop.bakeReduceKeys:
+            col.prop(prop, "bakeTolerance")
+
+        col.operator(BakeShapeKeyDrivers.bl_idname)
+        prop_split(col, prop, "shapeKeyBakeAction", "Bake Action")
+        col.prop(prop, "muteBakedDrivers")
+
+        col.operator(PruneShapeKeys.bl_idname)
+        col.prop(prop, "shapeKeyPruneThreshold")
+        col.prop(prop, "shapeKeyPruneDelete")
+
+        col.operator(CleanupSkinWeights.bl_idname)
+        prop_split(col, prop, "weightMaxInfluences", "Max Influences")
+        col.prop(prop, "weightPruneThreshold")
+        col.prop(prop, "weightNormalize")
+
+        col.operator(PruneDeformBones.bl_idname)
+        prop_split(col, prop, "pruneMode", "Unused Bones")
+        col.prop(prop, "pruneWeightThreshold")
+
+        col.operator(ExportGRTFBX.bl_idname)
+        prop_split(col, prop, "exportDirectory", "Export Folder")
+        col.prop(prop, "exportForce")
+
+        col.operator(ValidateDeformRig.bl_idname)
+        prop_split(col, prop, "validateAction", "Validate Action")
+        col.prop(prop, "validateAllActions")
+        col.prop(prop, "validateFrameStep")
+        col.prop(prop, "validatePositionTolerance")
+        col.prop(prop, "validateRotationTolerance")
+        col.prop(prop, "validateScaleTolerance")
+
+        col.operator(ProfileRigPlayback.bl_idname)
+        prop_split(col, prop, "profileAction", "Profile Action")
+        col.prop(prop, "profileFrameStep")
 
 
 def prop_split(layout, data, field, name, **prop_kwargs):
@@ -595,24 +2911,231 @@ class RigifyToGRTProperty(bpy.types.PropertyGroup):
         poll=pollShapeKeyRig,
     )
 
+    forceFullRegenerate: bpy.props.BoolProperty(
+        name="Force Full Regenerate",
+        description="Always run Rigify generation, even if the metarig and add-on rig have not changed since the last run",
+        default=False,
+    )
 
-ShapeKeySetupTypes = [
-    (
-        "Single",
-        "Single",
-        "Bone ranges from 0-0.5 in local Y space. Shapekey name same as bone with range [0-1]",
-    ),
-    (
-        "Eye",
-        "Eye",
-        "Bone ranges in +-0.25 in local XY space. Hardcoded to LookUp/LookDown/LookLeft/LookRight with range [0-1]",
-    ),
-]
+    copyScaleMode: bpy.props.EnumProperty(
+        items=[
+            ("All", "All Bones", "Add COPY_SCALE to every GRT bone"),
+            (
+                "Selective",
+                "Selective",
+                "Only add COPY_SCALE where the control rig bone can scale (unlocked scale controls, stretch constraints, keyed or driven scale)",
+            ),
+        ],
+        name="Copy Scale",
+    )
+
+    syncDrivers: bpy.props.BoolProperty(
+        name="Only Update Changed Drivers",
+        description="Compare each source driver with the existing target driver and only rewrite drivers that differ",
+        default=True,
+    )
+
+    removeStaleDrivers: bpy.props.BoolProperty(
+        name="Remove Stale Drivers",
+        description="Remove shape key drivers on the targets that have no matching driver on the source",
+        default=False,
+    )
+
+    rebindOldRig: bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        poll=pollShapeKeyRig,
+        description="Armature to replace. If empty, the first armature modifier of each selected object is updated",
+    )
+
+    rebindScope: bpy.props.EnumProperty(
+        items=[
+            ("Selected", "Selected", "Only selected objects"),
+            ("Scene", "Scene", "Every object in the scene"),
+            ("File", "File", "Every object in the file"),
+        ],
+        name="Scope",
+    )
+
+    rebindDryRun: bpy.props.BoolProperty(
+        name="Dry Run",
+        description="Only list what would be rebound",
+        default=False,
+    )
+
+    rewriteSlowDrivers: bpy.props.BoolProperty(
+        name="Rewrite Python Drivers",
+        description="Rewrite drivers that fall back to Python into an equivalent simple expression where possible",
+        default=False,
+    )
+
+    bakeAllActions: bpy.props.BoolProperty(
+        name="Bake All Actions",
+        description="Bake every pose action in the file instead of only the control rig's current action",
+        default=False,
+    )
+
+    bakeReduceKeys: bpy.props.BoolProperty(
+        name="Reduce Keyframes",
+        description="Remove baked keys that linear interpolation reproduces within the tolerance",
+        default=True,
+    )
+
+    bakeTolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        min=0,
+        default=0.0001,
+        precision=5,
+    )
+
+    shapeKeyBakeAction: bpy.props.PointerProperty(
+        type=bpy.types.Action,
+        description="Action played on the control rig while baking shape key drivers. Uses the scene frame range if empty",
+    )
+
+    muteBakedDrivers: bpy.props.BoolProperty(
+        name="Mute Baked Drivers",
+        description="Mute shape key drivers after baking them so the baked curves play back",
+        default=True,
+    )
+
+    shapeKeyPruneThreshold: bpy.props.FloatProperty(
+        name="Shape Key Threshold",
+        description="Shape keys that move no vertex further than this from their relative key are unused",
+        min=0,
+        default=0.0001,
+        precision=5,
+        unit="LENGTH",
+    )
+
+    shapeKeyPruneDelete: bpy.props.BoolProperty(
+        name="Delete Unused Shape Keys",
+        description="Delete unused shape keys and their drivers instead of only reporting them",
+        default=False,
+    )
+
+    weightMaxInfluences: bpy.props.EnumProperty(
+        items=[
+            ("4", "4", "4 influences per vertex"),
+            ("8", "8", "8 influences per vertex"),
+            ("12", "12", "12 influences per vertex"),
+        ],
+        name="Max Influences",
+        default="8",
+    )
+
+    weightPruneThreshold: bpy.props.FloatProperty(
+        name="Prune Threshold",
+        description="Deform weights below this are removed",
+        min=0,
+        max=1,
+        default=0.001,
+        precision=4,
+    )
+
+    weightNormalize: bpy.props.BoolProperty(
+        name="Normalize Weights",
+        default=True,
+    )
+
+    pruneMode: bpy.props.EnumProperty(
+        items=[
+            ("Report", "Report", "Only list unused deform bones"),
+            ("Undeform", "Undeform", "Turn off deform on unused bones"),
+            ("Delete", "Delete", "Delete unused bones"),
+        ],
+        name="Unused Bones",
+    )
+
+    pruneWeightThreshold: bpy.props.FloatProperty(
+        name="Weight Threshold",
+        description="Weights at or below this do not count as using a bone",
+        min=0,
+        max=1,
+        default=0.0,
+        precision=4,
+    )
+
+    exportDirectory: bpy.props.StringProperty(
+        name="Export Folder",
+        subtype="DIR_PATH",
+        default="//export/",
+    )
+
+    exportForce: bpy.props.BoolProperty(
+        name="Re-export Unchanged",
+        description="Export every file even if its content hash matches the last export",
+        default=False,
+    )
+
+    validateAction: bpy.props.PointerProperty(
+        type=bpy.types.Action,
+        description="Action played on the control rig while validating. Uses the scene frame range if empty",
+    )
+
+    validateAllActions: bpy.props.BoolProperty(
+        name="Validate All Actions",
+        description="Validate every control rig action instead of only the one set above",
+        default=False,
+    )
+
+    validateFrameStep: bpy.props.IntProperty(
+        name="Validate Frame Step",
+        min=1,
+        default=1,
+    )
+
+    validatePositionTolerance: bpy.props.FloatProperty(
+        name="Position Tolerance",
+        min=0,
+        default=0.001,
+        precision=5,
+        unit="LENGTH",
+    )
+
+    validateRotationTolerance: bpy.props.FloatProperty(
+        name="Rotation Tolerance",
+        description="In degrees",
+        min=0,
+        default=0.1,
+        precision=3,
+    )
+
+    validateScaleTolerance: bpy.props.FloatProperty(
+        name="Scale Tolerance",
+        min=0,
+        default=0.001,
+        precision=5,
+    )
+
+    profileAction: bpy.props.PointerProperty(
+        type=bpy.types.Action,
+        description="Action played on the control rig while profiling. Uses the scene frame range if empty",
+    )
+
+    profileFrameStep: bpy.props.IntProperty(
+        name="Profile Frame Step",
+        min=1,
+        default=1,
+    )
+
+
+# Built from driverPresets by loadDriverPresets()
+ShapeKeySetupTypes = []
+
+
+def getShapeKeySetupTypes(self, context):
+    return ShapeKeySetupTypes
 
 
 class ShapeKeySetupProperty(bpy.types.PropertyGroup):
     shapeKeyType: bpy.props.EnumProperty(
-        items=ShapeKeySetupTypes, name="Shapekey Category"
+        items=getShapeKeySetupTypes, name="Shapekey Category"
+    )
+
+    searchAllSkinnedMeshes: bpy.props.BoolProperty(
+        name="Search All Skinned Meshes",
+        description="Also set up drivers on meshes in the scene that use the rig in an armature modifier, not just its children",
+        default=False,
     )
 
 
@@ -624,10 +3147,23 @@ classes = [
     RigifyToGRTProperty,
     SetupShapekeyDriver,
     ShapeKeySetupProperty,
+    AuditDrivers,
+    ProfileRigPlayback,
+    BakeDeformActions,
+    UpdateAddonRig,
+    BakeShapeKeyDrivers,
+    PruneShapeKeys,
+    CleanupSkinWeights,
+    PruneDeformBones,
+    ExportGRTFBX,
+    PurgeGenerationData,
+    ReloadDriverPresets,
+    ValidateDeformRig,
 ]
 
 
 def register():
+    loadDriverPresets()
     for cls in classes:
         register_class(cls)
 
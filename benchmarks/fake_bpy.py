@@ -0,0 +1,452 @@
+"""
+Plain Python stand-in for the parts of bpy and mathutils used by the add-on's data-level code, so it can be run
+and timed without starting Blender.
+
+    import fake_bpy
+    addon = fake_bpy.loadAddon()
+
+Covers objects, armatures (bones, edit bones, pose bones), constraints, modifiers, meshes with shape keys and
+shape key drivers. Operators, bpy.ops and anything that needs the depsgraph are not emulated, calling bpy.ops
+raises NotImplementedError. Name lookups are dictionary based like Blender's, renaming items is not supported.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ADDON_DIR)
+import cli  # noqa: E402
+
+
+class PropCollection:
+    def __init__(self, items=()):
+        self.items = []
+        self.byName = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        self.items.append(item)
+        self.byName[item.name] = item
+        return item
+
+    def remove(self, item):
+        self.items.remove(item)
+        if self.byName.get(item.name) is item:
+            del self.byName[item.name]
+
+    def get(self, name, default=None):
+        return self.byName.get(name, default)
+
+    def keys(self):
+        return list(self.byName)
+
+    def values(self):
+        return list(self.items)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.byName[key]
+        return self.items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self.byName
+        return key in self.items
+
+    def __iter__(self):
+        return iter(list(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+
+class ID:
+    def __init__(self, name):
+        self.name = name
+        self.properties = {}
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def __setitem__(self, key, value):
+        self.properties[key] = value
+
+    def __contains__(self, key):
+        return key in self.properties
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+
+class Vector(tuple):
+    def __new__(cls, values=(0, 0, 0)):
+        return super().__new__(cls, values)
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self.rows = [list(row) for row in rows] if rows else [[float(i == j) for j in range(4)] for i in range(4)]
+
+    def copy(self):
+        return Matrix(self.rows)
+
+
+# Drivers
+
+
+class DriverTarget:
+    def __init__(self):
+        self.id = None
+        self.bone_target = ""
+        self.data_path = ""
+        self.rotation_mode = "AUTO"
+        self.transform_space = "WORLD_SPACE"
+        self.transform_type = "LOC_X"
+
+
+class DriverVariable:
+    targetCounts = {"SINGLE_PROP": 1, "TRANSFORMS": 1, "ROTATION_DIFF": 2, "LOC_DIFF": 2, "CONTEXT_PROP": 1}
+
+    def __init__(self):
+        self.name = "var"
+        self._type = "SINGLE_PROP"
+        self.targets = [DriverTarget()]
+
+    @property
+    def type(self):
+        return self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = value
+        count = self.targetCounts[value]
+        self.targets = (self.targets + [DriverTarget() for i in range(count)])[:count]
+
+
+class DriverVariables(list):
+    def new(self):
+        variable = DriverVariable()
+        self.append(variable)
+        return variable
+
+
+class Driver:
+    def __init__(self):
+        self.type = "SCRIPTED"
+        self.expression = ""
+        self.variables = DriverVariables()
+        self.is_simple_expression = True
+
+
+class FCurve:
+    def __init__(self, data_path, index=0):
+        self.data_path = data_path
+        self.array_index = index
+        self.driver = Driver()
+        self.mute = False
+
+
+class Drivers(list):
+    def remove(self, fcurve):
+        super().remove(fcurve)
+
+
+class AnimData:
+    def __init__(self):
+        self.action = None
+        self.drivers = Drivers()
+
+
+# Meshes and shape keys
+
+
+class KeyBlock:
+    def __init__(self, key, name):
+        self.id_data = key
+        self.name = name
+        self.value = 0.0
+        self.relative_key = self
+
+    def driver_add(self, path):
+        key = self.id_data
+        # Linear search like Blender's own lookup of an existing F-Curve
+        if key.animation_data is None:
+            key.animation_data = AnimData()
+        dataPath = f'key_blocks["{self.name}"].{path}'
+        for fcurve in key.animation_data.drivers:
+            if fcurve.data_path == dataPath:
+                return fcurve
+        fcurve = FCurve(dataPath)
+        key.animation_data.drivers.append(fcurve)
+        return fcurve
+
+
+class Key(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.key_blocks = PropCollection()
+        self.animation_data = None
+        self.reference_key = None
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.shape_keys = None
+
+
+# Armatures
+
+
+class Bone:
+    def __init__(self, name, parent=None, use_deform=True):
+        self.name = name
+        self.parent = parent
+        self.use_deform = use_deform
+        self.inherit_scale = "FULL"
+
+
+class EditBone(Bone):
+    pass
+
+
+class EditBones(PropCollection):
+    def new(self, name):
+        return self.add(EditBone(name))
+
+
+class Armature(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.bones = PropCollection()
+        self.edit_bones = EditBones()
+        self.display_type = "OCTAHEDRAL"
+
+
+class Constraint:
+    def __init__(self, type):
+        self.name = type.title()
+        self.type = type
+        self.mute = False
+        self.target = None
+        self.subtarget = ""
+        if type == "ARMATURE":
+            self.targets = ConstraintTargets()
+
+
+class ConstraintTarget:
+    def __init__(self):
+        self.target = None
+        self.subtarget = ""
+        self.weight = 1.0
+
+
+class ConstraintTargets(list):
+    def new(self):
+        target = ConstraintTarget()
+        self.append(target)
+        return target
+
+
+class Constraints(list):
+    def new(self, type):
+        constraint = Constraint(type)
+        self.append(constraint)
+        return constraint
+
+
+class PoseBone:
+    def __init__(self, bone):
+        self.name = bone.name
+        self.bone = bone
+        self.constraints = Constraints()
+        self.lock_scale = [False, False, False]
+
+
+class Pose:
+    def __init__(self, armature):
+        self.bones = PropCollection(PoseBone(bone) for bone in armature.bones)
+
+
+# Objects
+
+
+class Modifier:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.object = None
+
+
+class Modifiers(PropCollection):
+    def new(self, name, type):
+        return self.add(Modifier(name, type))
+
+
+class Object(ID):
+    def __init__(self, name, data=None):
+        super().__init__(name)
+        self.data = data
+        if isinstance(data, Armature):
+            self.type = "ARMATURE"
+        elif isinstance(data, Mesh):
+            self.type = "MESH"
+        else:
+            self.type = "EMPTY"
+        self.modifiers = Modifiers()
+        self.constraints = Constraints()
+        self.pose = Pose(data) if self.type == "ARMATURE" else None
+        self.animation_data = None
+        self.matrix_world = Matrix()
+        self.children = []
+        self._parent = None
+        self.parent_type = "OBJECT"
+        self.parent_bone = ""
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, value):
+        if self._parent is not None:
+            self._parent.children.remove(self)
+        self._parent = value
+        if value is not None:
+            value.children.append(self)
+
+    def shape_key_add(self, name="Key", from_mix=False):
+        if self.data.shape_keys is None:
+            self.data.shape_keys = Key(f"Key.{self.name}")
+        key = self.data.shape_keys
+        keyBlock = key.key_blocks.add(KeyBlock(key, name))
+        if key.reference_key is None:
+            key.reference_key = keyBlock
+        keyBlock.relative_key = key.reference_key
+        return keyBlock
+
+
+class Scene(ID):
+    def __init__(self, name="Scene"):
+        super().__init__(name)
+        self.objects = PropCollection()
+
+
+# Builders for synthetic inputs
+
+
+# bones is a list of (name, parent name or None)
+def makeArmatureObject(name, bones):
+    armature = Armature(name)
+    for boneName, parentName in bones:
+        armature.bones.add(Bone(boneName, armature.bones[parentName] if parentName else None))
+        armature.edit_bones.add(EditBone(boneName, armature.edit_bones[parentName] if parentName else None))
+    return Object(name, armature)
+
+
+def makeMeshObject(name, shapeKeyNames=()):
+    obj = Object(name, Mesh(name))
+    if shapeKeyNames:
+        obj.shape_key_add("Basis")
+        for shapeKeyName in shapeKeyNames:
+            obj.shape_key_add(shapeKeyName)
+    return obj
+
+
+# bpy module
+
+
+class FakeTypes(types.ModuleType):
+    # Any other bpy.types class referenced by the add-on becomes an empty placeholder class
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        cls = type(name, (), {})
+        setattr(self, name, cls)
+        return cls
+
+
+class FakeProps(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda **kwargs: (name, kwargs)
+
+
+class FakeOps:
+    def __init__(self, path="bpy.ops"):
+        self.path = path
+
+    def __getattr__(self, name):
+        return FakeOps(f"{self.path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        raise NotImplementedError(f"{self.path} is not available in the fake bpy layer.")
+
+
+def install():
+    if isinstance(sys.modules.get("bpy"), types.ModuleType) and getattr(sys.modules["bpy"], "isFake", False):
+        return sys.modules["bpy"]
+
+    bpy = types.ModuleType("bpy")
+    bpy.isFake = True
+
+    bpy.types = FakeTypes("bpy.types")
+    for cls in [Object, Armature, Mesh, Key, KeyBlock, Bone, EditBone, PoseBone, Constraint, Modifier, Scene]:
+        setattr(bpy.types, cls.__name__, cls)
+    for name in ["Operator", "Panel", "PropertyGroup"]:
+        setattr(bpy.types, name, type(name, (), {"report": lambda self, level, message: print(message)}))
+
+    bpy.props = FakeProps("bpy.props")
+    bpy.utils = types.ModuleType("bpy.utils")
+    bpy.utils.register_class = bpy.utils.unregister_class = lambda cls: None
+    bpy.ops = FakeOps()
+    bpy.app = types.SimpleNamespace(version=(4, 1, 0), version_string="fake", binary_path="")
+    bpy.path = types.SimpleNamespace(abspath=os.path.abspath)
+
+    scene = Scene()
+    bpy.context = types.SimpleNamespace(scene=scene, mode="OBJECT", selected_objects=[], active_object=None)
+    bpy.data = types.SimpleNamespace(objects=scene.objects, actions=PropCollection(), armatures=PropCollection())
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+
+    sys.modules["bpy"] = bpy
+    sys.modules["bpy.types"] = bpy.types
+    sys.modules["bpy.props"] = bpy.props
+    sys.modules["bpy.utils"] = bpy.utils
+    sys.modules["mathutils"] = mathutils
+    return bpy
+
+
+def loadAddon():
+    install()
+    if cli.ADDON_MODULE_NAME in sys.modules:
+        return sys.modules[cli.ADDON_MODULE_NAME]
+    spec = importlib.util.spec_from_file_location(
+        cli.ADDON_MODULE_NAME, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[cli.ADDON_MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    module.loadDriverPresets()
+    return module
+
+
+# Fresh scene and object list for the next benchmark
+def newScene():
+    bpy = install()
+    scene = Scene()
+    bpy.context.scene = scene
+    bpy.data.objects = scene.objects
+    return scene
+
+
+def link(scene, *objs):
+    for obj in objs:
+        scene.objects.add(obj)
+    return objs
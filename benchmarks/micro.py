@@ -0,0 +1,279 @@
+"""
+Micro-benchmarks of the add-on's data-level code in plain Python, on the fake bpy layer in fake_bpy.py.
+
+    python benchmarks/micro.py --sizes small,medium,large --repeat 5 --output micro_results.json
+
+Each size builds synthetic meshes, shape keys, drivers and armatures, then times transferShapeKeyDrivers (first
+run creating every driver, second run finding them unchanged), setupShapeKeyDrivers, rebindArmatures and the GRT
+hierarchy remapping of GenerateRig. No Blender process is started, so this only measures the add-on's own Python
+work, not the cost of the Blender API calls it makes. The best of --repeat runs is reported.
+
+The output of every timed function is checked (drivers, expressions and targets, rebound modifiers and parents, bone
+parents), so this doubles as a test run: it exits with 1 and lists the problems if any result is wrong.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+import fake_bpy
+
+SIZES = {
+    "small": {"meshes": 5, "shape_keys": 100, "drivers": 100, "bones": 50},
+    "medium": {"meshes": 20, "shape_keys": 500, "drivers": 500, "bones": 200},
+    "large": {"meshes": 50, "shape_keys": 2000, "drivers": 2000, "bones": 1000},
+}
+
+# Deform bones the GRT hierarchy remapping expects on a generated rig
+GRT_BONES = [
+    ("DEF-spine", None),
+    ("DEF-spine.003", "DEF-spine"),
+    ("DEF-spine.006", "DEF-spine.003"),
+    ("DEF-shoulder.L", None),
+    ("DEF-shoulder.R", None),
+    ("DEF-upper_arm.L", None),
+    ("DEF-upper_arm.R", None),
+    ("DEF-breast.L", None),
+    ("DEF-breast.R", None),
+    ("DEF-pelvis.L", None),
+    ("DEF-pelvis.R", None),
+    ("DEF-thigh.L", None),
+    ("DEF-thigh.R", None),
+    ("DEF-eye_master.L", None),
+    ("DEF-eye_master.R", None),
+]
+
+
+def buildScene(params):
+    scene = fake_bpy.newScene()
+    rigObj = fake_bpy.makeArmatureObject("Rig", [(f"Bone.{i:04d}", None) for i in range(params["bones"])])
+    newRigObj = fake_bpy.makeArmatureObject("NewRig", [])
+    fake_bpy.link(scene, rigObj, newRigObj)
+
+    # Shape keys are named after bones so the Single preset finds them
+    shapeKeyNames = [f"Bone.{i:04d}" for i in range(params["shape_keys"])]
+    meshObjs = []
+    for i in range(params["meshes"]):
+        meshObj = fake_bpy.makeMeshObject(f"Mesh.{i:03d}", shapeKeyNames)
+        meshObj.modifiers.new("Armature", "ARMATURE").object = rigObj
+        meshObj.parent = rigObj
+        meshObjs.append(meshObj)
+    fake_bpy.link(scene, *meshObjs)
+
+    # Drivers on the first mesh, which is the transfer source
+    for keyBlock in meshObjs[0].data.shape_keys.key_blocks[1 : params["drivers"] + 1]:
+        driver = keyBlock.driver_add("value").driver
+        driver.type = "SCRIPTED"
+        driver.expression = "var * 2"
+        var = driver.variables.new()
+        var.type = "TRANSFORMS"
+        var.name = "var"
+        var.targets[0].id = rigObj
+        var.targets[0].bone_target = keyBlock.name
+        var.targets[0].transform_type = "LOC_Y"
+        var.targets[0].transform_space = "LOCAL_SPACE"
+    return scene, rigObj, newRigObj, meshObjs
+
+
+def buildGRTRig(params):
+    faceBoneNames = [f"face.{i:04d}" for i in range(params["bones"])]
+    shapeKeyRigBoneNames = [f"Addon.{i:04d}" for i in range(params["bones"])]
+    bones = GRT_BONES + [(f"DEF-{name}", None) for name in faceBoneNames] + [(name, None) for name in shapeKeyRigBoneNames]
+    return fake_bpy.makeArmatureObject("Armature", bones), faceBoneNames, shapeKeyRigBoneNames
+
+
+def timeBest(function, setup, repeat):
+    best = None
+    result = None
+    args = None
+    for i in range(repeat):
+        args = setup()
+        # The API prints a line per rebound reference, keep that out of the timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function(*args)
+            seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result, args
+
+
+# Checks below return a list of problems with the results of the last timed run, empty when everything is right
+
+
+def getDriver(meshObj, shapeKeyName):
+    key = meshObj.data.shape_keys
+    if key.animation_data is None:
+        return None
+    for fcurve in key.animation_data.drivers:
+        if fcurve.data_path == f'key_blocks["{shapeKeyName}"].value':
+            return fcurve.driver
+    return None
+
+
+def checkDriver(meshObj, shapeKeyName, expression, rigObj, boneName):
+    driver = getDriver(meshObj, shapeKeyName)
+    where = f"{meshObj.name} {shapeKeyName}"
+    if driver is None:
+        return [f"{where}: no driver"]
+    if len(driver.variables) != 1:
+        return [f"{where}: {len(driver.variables)} variables"]
+    target = driver.variables[0].targets[0]
+    problems = []
+    if driver.expression != expression:
+        problems.append(f"{where}: expression {driver.expression!r}, expected {expression!r}")
+    if target.id is not rigObj or target.bone_target != boneName:
+        problems.append(f"{where}: targets {getattr(target.id, 'name', None)} {target.bone_target}")
+    if (target.transform_type, target.transform_space) != ("LOC_Y", "LOCAL_SPACE"):
+        problems.append(f"{where}: channel {target.transform_type} {target.transform_space}")
+    return problems
+
+
+def checkTransfer(counts, expectedKey, source, targets, rigObj, driverCount):
+    problems = []
+    if counts[expectedKey] != driverCount * len(targets):
+        problems.append(f"{counts[expectedKey]} {expectedKey}, expected {driverCount * len(targets)}")
+    for target in targets:
+        for keyBlock in target.data.shape_keys.key_blocks[1 : driverCount + 1]:
+            problems += checkDriver(target, keyBlock.name, "var * 2", rigObj, keyBlock.name)
+    return problems
+
+
+def checkSetup(result, rigObj, boneNames, meshObjs, params):
+    driverCount, bindingCount = result
+    shapeKeyCount = min(params["bones"], params["shape_keys"])
+    problems = []
+    if (driverCount, bindingCount) != (shapeKeyCount * len(meshObjs), len(boneNames)):
+        problems.append(f"{driverCount} drivers for {bindingCount} bindings")
+    for meshObj in meshObjs:
+        for boneName in boneNames[:shapeKeyCount]:
+            problems += checkDriver(meshObj, boneName, "var * 2", rigObj, boneName)
+    return problems
+
+
+def checkRebind(users, newRigObj, objs, oldRigObj):
+    meshObjs = [obj for obj in objs if obj.type == "MESH"]
+    problems = []
+    # One armature modifier and one parent per mesh
+    if len(users) != 2 * len(meshObjs):
+        problems.append(f"{len(users)} references rebound, expected {2 * len(meshObjs)}")
+    for meshObj in meshObjs:
+        if meshObj.modifiers["Armature"].object is not newRigObj:
+            problems.append(f"{meshObj.name}: armature modifier not rebound")
+        if meshObj.parent is not newRigObj:
+            problems.append(f"{meshObj.name}: parent not rebound")
+    if any(obj.parent is oldRigObj for obj in objs):
+        problems.append(f"objects still parented to {oldRigObj.name}")
+    return problems
+
+
+def checkReparent(editBones, faceBoneNames, shapeKeyRigBoneNames):
+    expected = {
+        "DEF-upper_arm.L": "DEF-shoulder.L",
+        "DEF-upper_arm.R": "DEF-shoulder.R",
+        "DEF-shoulder.L": "DEF-spine.003",
+        "DEF-breast.L": "DEF-spine.003",
+        "DEF-thigh.L": "DEF-pelvis.L",
+        "DEF-thigh.R": "DEF-pelvis.R",
+        "DEF-pelvis.L": "DEF-spine",
+        "DEF-eye_master.L": "DEF-spine.006",
+    }
+    expected.update({f"DEF-{name}": "DEF-spine.006" for name in faceBoneNames})
+    expected.update({name: "DEF-spine.006" for name in shapeKeyRigBoneNames})
+    problems = []
+    for name, parentName in expected.items():
+        parent = editBones[name].parent
+        if parent is None or parent.name != parentName:
+            problems.append(f"{name} parented to {getattr(parent, 'name', None)}, expected {parentName}")
+    return problems
+
+
+def runSize(addon, params, repeat):
+    timings = {}
+    problems = {}
+    driverCount = min(params["drivers"], params["shape_keys"])
+
+    def transferSetup():
+        scene, rigObj, newRigObj, meshObjs = buildScene(params)
+        return meshObjs[0], meshObjs[1:], rigObj
+
+    timings["transferShapeKeyDrivers"], counts, args = timeBest(addon.transferShapeKeyDrivers, transferSetup, repeat)
+    problems["transferShapeKeyDrivers"] = checkTransfer(counts, "created", *args, driverCount)
+
+    def syncSetup():
+        source, targets, rigObj = transferSetup()
+        addon.transferShapeKeyDrivers(source, targets, rigObj)
+        return source, targets, rigObj
+
+    name = "transferShapeKeyDrivers (sync)"
+    timings[name], counts, args = timeBest(addon.transferShapeKeyDrivers, syncSetup, repeat)
+    problems[name] = checkTransfer(counts, "unchanged", *args, driverCount)
+
+    def setupSetup():
+        scene, rigObj, newRigObj, meshObjs = buildScene(params)
+        return rigObj, [poseBone.name for poseBone in rigObj.pose.bones], "Single", None, False, scene
+
+    timings["setupShapeKeyDrivers"], result, args = timeBest(addon.setupShapeKeyDrivers, setupSetup, repeat)
+    rigObj, boneNames = args[0], args[1]
+    meshObjs = [obj for obj in args[5].objects if obj.type == "MESH"]
+    problems["setupShapeKeyDrivers"] = checkSetup(result, rigObj, boneNames, meshObjs, params)
+
+    def rebindSetup():
+        scene, rigObj, newRigObj, meshObjs = buildScene(params)
+        return newRigObj, list(scene.objects), rigObj
+
+    timings["rebindArmatures"], users, args = timeBest(addon.rebindArmatures, rebindSetup, repeat)
+    problems["rebindArmatures"] = checkRebind(users, *args)
+
+    def reparentSetup():
+        GRTRigObj, faceBoneNames, shapeKeyRigBoneNames = buildGRTRig(params)
+        return GRTRigObj.data.edit_bones, faceBoneNames, shapeKeyRigBoneNames
+
+    reparent = addon.GenerateRig.reparentDeformBones
+    timings["reparentDeformBones"], result, args = timeBest(reparent, reparentSetup, repeat)
+    problems["reparentDeformBones"] = checkReparent(*args)
+
+    return timings, problems
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="small,medium", help="Comma separated names from SIZES.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args(argv)
+
+    addon = fake_bpy.loadAddon()
+
+    results = []
+    failed = False
+    for sizeName in args.sizes.split(","):
+        print(f"Running {sizeName}: {SIZES[sizeName]}")
+        timings, problems = runSize(addon, SIZES[sizeName], args.repeat)
+        for name, seconds in timings.items():
+            print(f"    {name}: {seconds * 1000:.1f}ms{' FAILED' if problems[name] else ''}")
+            for problem in problems[name][:10]:
+                print(f"        {problem}")
+        failed = failed or any(problems.values())
+        results.append(
+            {
+                "size": sizeName,
+                "params": SIZES[sizeName],
+                "timings": timings,
+                "passed": {name: not problems[name] for name in timings},
+            }
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=4)
+        print(f"Results written to {args.output}")
+    if failed:
+        print("Some results were wrong, see above.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
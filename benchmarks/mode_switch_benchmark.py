@@ -0,0 +1,95 @@
+"""
+Compares the mode switching cost of GenerateRig against the previous implementation.
+
+    blender --background character.blend --python benchmarks/mode_switch_benchmark.py -- --metarig metarig --repeat 5
+
+The rig is generated once with the current operator, which records every mode switch it makes.
+The mode switch sequences of the previous implementation and of the current one are then replayed
+on the generated control and GRT rigs, so both are timed on the same armatures. The legacy GRT rig
+sequence is replayed with the control rig also selected, as the previous implementation had it.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cli  # noqa: E402
+
+# Mode switches made by each implementation, per rig
+LEGACY_SEQUENCES = {
+    "control": ["POSE", "OBJECT", "EDIT", "OBJECT", "EDIT", "POSE", "OBJECT"],
+    "grt": ["EDIT", "POSE", "OBJECT"],
+}
+CURRENT_SEQUENCES = {
+    "control": ["EDIT", "OBJECT"],
+    "grt": ["EDIT", "OBJECT"],
+}
+# Other rigs that were selected while the legacy sequence ran. The previous implementation entered edit mode on
+# the GRT rig with the control rig still selected, which made it a multi-object edit session.
+LEGACY_ALSO_SELECTED = {
+    "control": [],
+    "grt": ["control"],
+}
+
+
+def replay(rigObj, sequence, repeat, alsoSelected=()):
+    cli.selectOnly(rigObj)
+    for obj in alsoSelected:
+        obj.hide_set(False)
+        obj.select_set(True)
+    start = time.perf_counter()
+    for i in range(repeat):
+        for mode in sequence:
+            bpy.ops.object.mode_set(mode=mode)
+        if bpy.context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--metarig", default="metarig")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args(argv)
+
+    cli.ensureAddonRegistered()
+    cli.selectOnly(bpy.data.objects[args.metarig])
+
+    start = time.perf_counter()
+    bpy.ops.object.generate_grt_rig_from_rigify_metarig()
+    generateSeconds = time.perf_counter() - start
+
+    GRTSettings = bpy.context.scene.GRT_Action_Bakery_Global_Settings
+    rigs = {"control": GRTSettings.Source_Armature, "grt": GRTSettings.Target_Armature}
+
+    results = {
+        "generate_seconds": generateSeconds,
+        "recorded_mode_switches": [
+            list(switch) for switch in bpy.types.OBJECT_OT_generate_grt_rig_from_rigify_metarig.lastModeSwitches
+        ],
+        "rigs": {},
+    }
+    for rigName, rigObj in rigs.items():
+        alsoSelected = [rigs[name] for name in LEGACY_ALSO_SELECTED[rigName]]
+        legacy = replay(rigObj, LEGACY_SEQUENCES[rigName], args.repeat, alsoSelected)
+        current = replay(rigObj, CURRENT_SEQUENCES[rigName], args.repeat)
+        results["rigs"][rigName] = {
+            "bones": len(rigObj.data.bones),
+            "legacy_seconds": legacy,
+            "current_seconds": current,
+        }
+        print(f"{rigName} ({len(rigObj.data.bones)} bones): legacy {legacy:.3f}s, current {current:.3f}s, saved {legacy - current:.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main(cli.getScriptArgs())
@@ -0,0 +1,244 @@
+"""
+Benchmark suite for the add-on's operators on synthetic scenes of configurable size.
+
+    blender --background --python benchmarks/suite.py -- --sizes small,medium,large --output results.json
+    blender --background --python benchmarks/suite.py -- --output results.json --baseline baseline.json
+
+Each size builds a fresh scene with Rigify's human metarig plus extra face bones, an add-on rig, skinned meshes
+with shape keys and shape key drivers, then times GenerateRig, TransferShapeKeyDrivers, SetupShapekeyDriver and
+UpdateArmatureReferences. Results are written as JSON. With --baseline, timings are compared against a previous
+results file and regressions are listed; the scaling exponent of each operator across sizes is always reported
+(about 1 for linear, about 2 for quadratic).
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cli  # noqa: E402
+
+SIZES = {
+    "small": {"face_bones": 10, "addon_bones": 10, "meshes": 5, "shape_keys": 20, "drivers": 20},
+    "medium": {"face_bones": 50, "addon_bones": 50, "meshes": 20, "shape_keys": 100, "drivers": 100},
+    "large": {"face_bones": 200, "addon_bones": 200, "meshes": 40, "shape_keys": 300, "drivers": 300},
+}
+
+# The size parameter that each operator is expected to scale with
+SCALE_PARAMETERS = {
+    "GenerateRig": lambda params: params["face_bones"] + params["addon_bones"],
+    "TransferShapeKeyDrivers": lambda params: params["meshes"] * params["drivers"],
+    "SetupShapekeyDriver": lambda params: params["meshes"] * params["addon_bones"],
+    "UpdateArmatureReferences": lambda params: params["meshes"],
+}
+
+
+def selectOnly(objs, active):
+    bpy.ops.object.select_all(action="DESELECT")
+    for obj in objs:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = active
+
+
+def buildScene(params):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    cli.ensureAddonRegistered()
+    scene = bpy.context.scene
+
+    bpy.ops.object.armature_human_metarig_add()
+    metarigObj = bpy.context.active_object
+
+    # Extra face bones, generated as plain deform copies
+    bpy.ops.object.mode_set(mode="EDIT")
+    editBones = metarigObj.data.edit_bones
+    head = editBones["spine.006"]
+    for i in range(params["face_bones"]):
+        editBone = editBones.new(f"face_extra.{i:03d}")
+        editBone.head = head.head + (head.tail - head.head) * (i / max(1, params["face_bones"]))
+        editBone.tail = editBone.head + (head.tail - head.head) * 0.05
+        editBone.parent = head
+    bpy.ops.object.mode_set(mode="OBJECT")
+    for i in range(params["face_bones"]):
+        metarigObj.pose.bones[f"face_extra.{i:03d}"].rigify_type = "basic.super_copy"
+
+    # Add-on rig with one deform bone per shape key driver
+    addonArmature = bpy.data.armatures.new("AddonRig")
+    addonRigObj = bpy.data.objects.new("AddonRig", addonArmature)
+    scene.collection.objects.link(addonRigObj)
+    selectOnly([addonRigObj], addonRigObj)
+    bpy.ops.object.mode_set(mode="EDIT")
+    for i in range(params["addon_bones"]):
+        editBone = addonRigObj.data.edit_bones.new(f"Addon.{i:03d}")
+        editBone.head = (0, 0, 1.6 + i * 0.001)
+        editBone.tail = (0, 0.02, 1.6 + i * 0.001)
+        editBone.use_deform = True
+    bpy.ops.object.mode_set(mode="OBJECT")
+    scene.rigifyToGRTProperty.shapeKeyRig = addonRigObj
+
+    # Skinned meshes, shape keys are named after add-on bones so SetupShapekeyDriver finds them
+    shapeKeyNames = [f"Addon.{i:03d}" for i in range(min(params["shape_keys"], params["addon_bones"]))]
+    shapeKeyNames += [f"Shape.{i:03d}" for i in range(params["shape_keys"] - len(shapeKeyNames))]
+    gridSize = 10
+    verts = [(x * 0.1, 0, y * 0.1) for y in range(gridSize) for x in range(gridSize)]
+    faces = [
+        (y * gridSize + x, y * gridSize + x + 1, (y + 1) * gridSize + x + 1, (y + 1) * gridSize + x)
+        for y in range(gridSize - 1)
+        for x in range(gridSize - 1)
+    ]
+    meshObjs = []
+    for i in range(params["meshes"]):
+        mesh = bpy.data.meshes.new(f"Mesh.{i:03d}")
+        mesh.from_pydata(verts, [], faces)
+        meshObj = bpy.data.objects.new(mesh.name, mesh)
+        scene.collection.objects.link(meshObj)
+        meshObj.modifiers.new("Armature", "ARMATURE").object = metarigObj
+        meshObj.shape_key_add(name="Basis")
+        for name in shapeKeyNames:
+            meshObj.shape_key_add(name=name, from_mix=False)
+        meshObjs.append(meshObj)
+
+    # Drivers on the first mesh, which is the TransferShapeKeyDrivers source
+    for i, keyBlock in enumerate(meshObjs[0].data.shape_keys.key_blocks[1 : params["drivers"] + 1]):
+        driver = keyBlock.driver_add("value").driver
+        driver.type = "SCRIPTED"
+        driver.expression = "var * 2"
+        var = driver.variables.new()
+        var.type = "TRANSFORMS"
+        var.name = "var"
+        var.targets[0].id = metarigObj
+        var.targets[0].bone_target = "spine.006"
+        var.targets[0].transform_type = "LOC_Y"
+        var.targets[0].transform_space = "LOCAL_SPACE"
+
+    return metarigObj, addonRigObj, meshObjs
+
+
+def timeOperator(operator, **kwargs):
+    start = time.perf_counter()
+    operator(**kwargs)
+    return time.perf_counter() - start
+
+
+def runSize(params):
+    metarigObj, addonRigObj, meshObjs = buildScene(params)
+    timings = {}
+
+    selectOnly([metarigObj], metarigObj)
+    timings["GenerateRig"] = timeOperator(bpy.ops.object.generate_grt_rig_from_rigify_metarig)
+    stageTimings = dict(bpy.types.OBJECT_OT_generate_grt_rig_from_rigify_metarig.lastStageTimings)
+    GRTSettings = bpy.context.scene.GRT_Action_Bakery_Global_Settings
+    ikRigObj = GRTSettings.Source_Armature
+    GRTRigObj = GRTSettings.Target_Armature
+
+    selectOnly(meshObjs, meshObjs[0])
+    bpy.context.scene.rigifyToGRTProperty.rigObj = ikRigObj
+    timings["TransferShapeKeyDrivers"] = timeOperator(bpy.ops.object.transfer_shape_key_drivers)
+
+    for meshObj in meshObjs:
+        meshObj.parent = ikRigObj
+    selectOnly([ikRigObj], ikRigObj)
+    bpy.ops.object.mode_set(mode="POSE")
+    for poseBone in ikRigObj.pose.bones:
+        poseBone.bone.select = poseBone.name.startswith("Addon.")
+    bpy.context.scene.shapeKeySetupProperty.shapeKeyType = "Single"
+    timings["SetupShapekeyDriver"] = timeOperator(bpy.ops.object.setup_shapekey_driver)
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    selectOnly(meshObjs + [GRTRigObj], GRTRigObj)
+    timings["UpdateArmatureReferences"] = timeOperator(bpy.ops.object.update_armature_refs)
+
+    return timings, stageTimings
+
+
+# Slope of log(time) against log(size), about 1 for linear and 2 for quadratic scaling
+def getScalingExponent(results, operatorName):
+    points = [
+        (math.log(SCALE_PARAMETERS[operatorName](result["params"])), math.log(result["timings"][operatorName]))
+        for result in results
+        if result["timings"].get(operatorName, 0) > 0 and SCALE_PARAMETERS[operatorName](result["params"]) > 0
+    ]
+    if len(points) < 2:
+        return None
+    meanX = sum(x for x, y in points) / len(points)
+    meanY = sum(y for x, y in points) / len(points)
+    variance = sum((x - meanX) ** 2 for x, y in points)
+    if variance == 0:
+        return None
+    return sum((x - meanX) * (y - meanY) for x, y in points) / variance
+
+
+def compareToBaseline(results, baseline, tolerance):
+    baselineTimings = {result["size"]: result["timings"] for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        for operatorName, seconds in result["timings"].items():
+            baselineSeconds = baselineTimings.get(result["size"], {}).get(operatorName)
+            if not baselineSeconds:
+                continue
+            ratio = seconds / baselineSeconds
+            print(f"{result['size']} {operatorName}: {seconds:.3f}s vs {baselineSeconds:.3f}s baseline ({ratio:.2f}x)")
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    {"size": result["size"], "operator": operatorName, "seconds": seconds, "baseline": baselineSeconds}
+                )
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="small,medium,large", help="Comma separated names from SIZES.")
+    parser.add_argument("--sizes-file", help="JSON file of {name: params} to use instead of the built-in sizes.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Previous results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression.")
+    args = parser.parse_args(argv)
+
+    cli.ensureAddonRegistered()
+
+    sizes = SIZES
+    if args.sizes_file:
+        with open(args.sizes_file, "r", encoding="utf-8") as f:
+            sizes = json.load(f)
+    sizeNames = list(sizes) if args.sizes_file else args.sizes.split(",")
+
+    results = []
+    for sizeName in sizeNames:
+        print(f"Running {sizeName}: {sizes[sizeName]}")
+        timings, stageTimings = runSize(sizes[sizeName])
+        for operatorName, seconds in timings.items():
+            print(f"    {operatorName}: {seconds:.3f}s")
+        results.append(
+            {"size": sizeName, "params": sizes[sizeName], "timings": timings, "generate_stages": stageTimings}
+        )
+
+    scaling = {}
+    for operatorName in SCALE_PARAMETERS:
+        exponent = getScalingExponent(results, operatorName)
+        scaling[operatorName] = exponent
+        if exponent is not None:
+            print(f"{operatorName} scales with exponent {exponent:.2f}")
+
+    output = {"blender": bpy.app.version_string, "results": results, "scaling": scaling}
+
+    exitCode = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        output["regressions"] = compareToBaseline(results, baseline, args.tolerance)
+        for regression in output["regressions"]:
+            print(f"REGRESSION {regression['size']} {regression['operator']}")
+        exitCode = 1 if output["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4)
+    print(f"Results written to {args.output}")
+    return exitCode
+
+
+if __name__ == "__main__":
+    sys.exit(main(cli.getScriptArgs()))
@@ -0,0 +1,492 @@
+"""
+Command line entry points for running the Unreal Rigify To GRT tools without the UI.
+
+Batch rig generation over a manifest of .blend files, spread across worker Blender processes:
+
+    python cli.py generate manifest.json --workers 4 --report report.json
+    blender --background --python cli.py -- generate manifest.json --workers 4
+
+The manifest is a JSON list with one entry per metarig. Relative paths are resolved against the manifest's folder.
+
+    [
+        {"blend": "characters/hero.blend", "metarig": "metarig"},
+        {"blend": "characters/villain.blend", "metarig": "metarig", "addon_rig": "FaceRig", "output": "out/villain.blend"}
+    ]
+
+Each worker opens its .blend file, generates the rig with generateRigs() and saves the file
+(in place unless "output" or --output-dir is given). Entries for the same file and output are generated by one
+worker, so several metarigs in one file must share their "addon_rig". Entries from different files that would be
+saved to the same output are rejected. The report records per-file wall time and errors.
+
+Change-aware FBX export of a generated rig, its skinned meshes and each baked action, spread across workers:
+
+    python cli.py export character.blend --output-dir export --workers 4
+
+A first worker hashes the skeletal mesh and every action. Files whose hash matches export_manifest.json in the
+output folder (and that still exist) are skipped, the rest are split between the workers. The manifest is then
+rewritten with the hash, status and export time of every file.
+
+Pose validation of a generated rig, exits with 1 if any deform bone drifts from its control bone past the tolerances:
+
+    blender --background character.blend --python cli.py -- validate --all-actions --output validation.json
+
+Playback profiling of a generated rig, run inside Blender on a file that already has one:
+
+    blender --background character.blend --python cli.py -- profile --action Walk --output profile.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# The export manifest helpers are shared with the add-on, Blender does not put this folder on the path by itself
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from export_manifest import EXPORT_MANIFEST_NAME, readExportManifest, writeExportManifest  # noqa: E402
+
+ADDON_MODULE_NAME = "unreal_rigify_grt"
+
+
+def getScriptArgs():
+    # Blender passes script arguments after "--"
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1 :]
+    return sys.argv[1:]
+
+
+def getDefaultBlender():
+    try:
+        import bpy
+
+        return bpy.app.binary_path
+    except ImportError:
+        return os.environ.get("BLENDER", "blender")
+
+
+def loadManifest(manifestPath, outputDir=None):
+    with open(manifestPath, "r", encoding="utf-8") as manifestFile:
+        entries = json.load(manifestFile)
+
+    baseDir = os.path.dirname(os.path.abspath(manifestPath))
+    jobs = {}
+    for entry in entries:
+        if "blend" not in entry or "metarig" not in entry:
+            raise RuntimeError(f'Manifest entry is missing "blend" or "metarig": {entry}')
+        blendPath = os.path.normpath(os.path.join(baseDir, entry["blend"]))
+        if entry.get("output"):
+            outputPath = os.path.normpath(os.path.join(baseDir, entry["output"]))
+        elif outputDir:
+            outputPath = os.path.join(os.path.abspath(outputDir), os.path.basename(blendPath))
+        else:
+            outputPath = blendPath
+
+        # One job per output file, workers saving to the same file would overwrite each other
+        job = jobs.get(outputPath)
+        if job is None:
+            jobs[outputPath] = {
+                "blend": blendPath,
+                "metarigs": [entry["metarig"]],
+                "addon_rig": entry.get("addon_rig"),
+                "output": outputPath,
+            }
+        elif job["blend"] != blendPath:
+            raise RuntimeError(f"{job['blend']} and {blendPath} would both be saved to {outputPath}.")
+        elif job["addon_rig"] != entry.get("addon_rig"):
+            raise RuntimeError(f"Metarigs in {blendPath} use different add-on rigs, they are generated together.")
+        else:
+            job["metarigs"].append(entry["metarig"])
+
+    # Nor may a worker save over a file another worker is still reading
+    for outputPath, job in jobs.items():
+        for other in jobs.values():
+            if other is not job and other["blend"] == outputPath:
+                raise RuntimeError(f"{job['blend']} would be saved over {other['blend']}, which is also in the manifest.")
+    return list(jobs.values())
+
+
+# Runs one worker Blender process, which writes its result as JSON to the file passed with --result
+def runBlender(blender, blendPath, workerArgs, timeout):
+    resultFile = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    resultFile.close()
+
+    command = [
+        blender,
+        "--background",
+        blendPath,
+        "--python",
+        os.path.abspath(__file__),
+        "--",
+        *workerArgs,
+        "--result",
+        resultFile.name,
+    ]
+
+    start = time.perf_counter()
+    result = None
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        with open(resultFile.name, "r", encoding="utf-8") as f:
+            content = f.read()
+        if content:
+            result = json.loads(content)
+        else:
+            # Worker died before writing a result, keep the end of its output for the report
+            result = {
+                "status": "error",
+                "error": f"Blender exited with code {process.returncode}.\n{process.stderr[-4000:] or process.stdout[-4000:]}",
+            }
+    except subprocess.TimeoutExpired:
+        result = {"status": "error", "error": f"Timed out after {timeout} seconds."}
+    except OSError as e:
+        result = {"status": "error", "error": f"Could not start Blender: {e}"}
+    finally:
+        os.remove(resultFile.name)
+
+    result["wall_seconds"] = time.perf_counter() - start
+    return result
+
+
+def runWorker(blender, job, timeout):
+    workerArgs = ["generate-worker", "--output", job["output"]]
+    for metarigName in job["metarigs"]:
+        workerArgs += ["--metarig", metarigName]
+    if job["addon_rig"]:
+        workerArgs += ["--addon-rig", job["addon_rig"]]
+
+    result = runBlender(blender, job["blend"], workerArgs, timeout)
+    result.update(job)
+    return result
+
+
+def generate(args):
+    jobs = loadManifest(args.manifest, args.output_dir)
+    blender = args.blender or getDefaultBlender()
+
+    print(f"Generating {sum(len(job['metarigs']) for job in jobs)} rig(s) in {len(jobs)} file(s) with {args.workers} worker(s)")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda job: runWorker(blender, job, args.timeout), jobs))
+
+    for result in results:
+        print(f'[{result["status"]}] {result["blend"]} ({", ".join(result["metarigs"])}): {result["wall_seconds"]:.2f}s')
+        if result["status"] != "ok":
+            print(result["error"])
+
+    report = {
+        "manifest": os.path.abspath(args.manifest),
+        "workers": args.workers,
+        "wall_seconds": time.perf_counter() - start,
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] != "ok"),
+        "files": results,
+    }
+    with open(args.report, "w", encoding="utf-8") as reportFile:
+        json.dump(report, reportFile, indent=4)
+    print(f'Finished: {report["succeeded"]} succeeded, {report["failed"]} failed. Report written to {args.report}')
+
+    return 0 if report["failed"] == 0 else 1
+
+
+def export(args):
+    blender = args.blender or getDefaultBlender()
+    blendPath = os.path.abspath(args.blend)
+    outputDir = os.path.abspath(args.output_dir)
+    start = time.perf_counter()
+
+    planArgs = ["export-plan", "--output-dir", outputDir]
+    if args.rig:
+        planArgs += ["--rig", args.rig]
+    if args.force:
+        planArgs.append("--force")
+    plan = runBlender(blender, blendPath, planArgs, args.timeout)
+    if plan["status"] != "ok":
+        print(plan["error"])
+        return 1
+
+    # Skeletal mesh first, it is usually the slowest file
+    changed = [fileName for fileName, entry in plan["files"].items() if entry["changed"]]
+    changed.sort(key=lambda fileName: plan["files"][fileName]["kind"] != "skeletal_mesh")
+    workerCount = min(args.workers, len(changed))
+    groups = [changed[i::workerCount] for i in range(workerCount)]
+    print(f'{len(changed)} of {len(plan["files"])} files changed, exporting with {workerCount} worker(s)')
+
+    def exportGroup(fileNames):
+        jobFile = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+        json.dump({"rig": plan["rig"], "files": {fileName: plan["files"][fileName] for fileName in fileNames}}, jobFile)
+        jobFile.close()
+        try:
+            workerArgs = ["export-worker", "--output-dir", outputDir, "--job", jobFile.name]
+            result = runBlender(blender, blendPath, workerArgs, args.timeout)
+        finally:
+            os.remove(jobFile.name)
+        if result["status"] != "ok":
+            return {fileName: {"seconds": None, "error": result["error"]} for fileName in fileNames}
+        return result["files"]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workerCount)) as pool:
+        for groupResults in pool.map(exportGroup, groups):
+            results.update(groupResults)
+
+    manifest = writeExportManifest(outputDir, plan, results)
+    for fileName, record in manifest["files"].items():
+        seconds = f'{record["seconds"]:.2f}s' if record.get("seconds") is not None else "-"
+        print(f'[{record["status"]}] {fileName}: {seconds}')
+        if record.get("error"):
+            print(record["error"])
+
+    failed = sum(1 for record in manifest["files"].values() if record["status"] == "failed")
+    print(
+        f"Finished in {time.perf_counter() - start:.2f}s: {len(results) - failed} exported, "
+        f"{len(plan['files']) - len(changed)} unchanged, {failed} failed. "
+        f"Manifest written to {os.path.join(outputDir, EXPORT_MANIFEST_NAME)}"
+    )
+    return 0 if failed == 0 else 1
+
+
+# Everything below runs inside a worker Blender process.
+
+
+def ensureAddonRegistered():
+    import bpy
+    import addon_utils
+
+    if "rigify_generate" not in dir(bpy.ops.pose):
+        addon_utils.enable("rigify", default_set=False)
+    if "generate_game_rig" not in dir(bpy.ops.gamerigtool):
+        raise RuntimeError("Game Rig Tools add-on is not enabled.")
+
+    # Load this add-on straight from its folder if it is not installed
+    if "generate_grt_rig_from_rigify_metarig" not in dir(bpy.ops.object):
+        addonDir = os.path.dirname(os.path.abspath(__file__))
+        spec = importlib.util.spec_from_file_location(
+            ADDON_MODULE_NAME, os.path.join(addonDir, "__init__.py"), submodule_search_locations=[addonDir]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[ADDON_MODULE_NAME] = module
+        spec.loader.exec_module(module)
+        module.register()
+
+    # The add-on module, under whatever name it was installed as
+    return sys.modules[bpy.types.OBJECT_OT_generate_grt_rig_from_rigify_metarig.__module__]
+
+
+def selectOnly(obj):
+    import bpy
+
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+    obj.hide_set(False)
+    bpy.ops.object.select_all(action="DESELECT")
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+
+
+def generateWorker(args):
+    import bpy
+
+    result = {"status": "ok", "error": None}
+    start = time.perf_counter()
+    try:
+        addon = ensureAddonRegistered()
+
+        metarigObjs = []
+        for metarigName in args.metarig:
+            metarigObj = bpy.data.objects.get(metarigName)
+            if metarigObj is None:
+                raise RuntimeError(f"Metarig {metarigName} not found.")
+            metarigObjs.append(metarigObj)
+
+        addonRigObj = None
+        if args.addon_rig:
+            addonRigObj = bpy.data.objects.get(args.addon_rig)
+            if addonRigObj is None:
+                raise RuntimeError(f"Add-on rig {args.addon_rig} not found.")
+        bpy.context.scene.rigifyToGRTProperty.shapeKeyRig = addonRigObj
+
+        generateStart = time.perf_counter()
+        rigResults = addon.generateRigs(metarigObjs, addonRigObj)
+        result["generate_seconds"] = time.perf_counter() - generateStart
+        result["rigs"] = {
+            name: {"seconds": rigResult["seconds"], "error": rigResult["error"]} for name, rigResult in rigResults.items()
+        }
+        if len(metarigObjs) == 1:
+            result["stage_timings"] = dict(addon.GenerateRig.lastStageTimings)
+        failed = [f"{name}: {rigResult['error']}" for name, rigResult in rigResults.items() if rigResult["error"]]
+        if failed:
+            raise RuntimeError("Generation failed, file not saved.\n" + "\n".join(failed))
+
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        bpy.ops.wm.save_as_mainfile(filepath=args.output)
+    except Exception:
+        result["status"] = "error"
+        result["error"] = traceback.format_exc()
+        print(result["error"])
+
+    result["seconds"] = time.perf_counter() - start
+    with open(args.result, "w", encoding="utf-8") as resultFile:
+        json.dump(result, resultFile)
+
+
+def getExportRig(rigName):
+    import bpy
+
+    if rigName:
+        rigObj = bpy.data.objects.get(rigName)
+        if rigObj is None:
+            raise RuntimeError(f"Rig {rigName} not found.")
+        return rigObj
+    rigObj = bpy.context.scene.GRT_Action_Bakery_Global_Settings.Target_Armature
+    if rigObj is None:
+        raise RuntimeError("GRT target armature not set, generate a rig first.")
+    return rigObj
+
+
+def exportPlanWorker(args):
+    result = {"status": "ok", "error": None}
+    try:
+        addon = ensureAddonRegistered()
+        result.update(addon.getExportPlan(getExportRig(args.rig), args.output_dir, args.force))
+    except Exception:
+        result["status"] = "error"
+        result["error"] = traceback.format_exc()
+        print(result["error"])
+
+    with open(args.result, "w", encoding="utf-8") as resultFile:
+        json.dump(result, resultFile)
+
+
+def exportWorker(args):
+    result = {"status": "ok", "error": None}
+    try:
+        addon = ensureAddonRegistered()
+        with open(args.job, "r", encoding="utf-8") as jobFile:
+            job = json.load(jobFile)
+        result["files"] = addon.exportFiles(getExportRig(job["rig"]), args.output_dir, job["files"])
+    except Exception:
+        result["status"] = "error"
+        result["error"] = traceback.format_exc()
+        print(result["error"])
+
+    with open(args.result, "w", encoding="utf-8") as resultFile:
+        json.dump(result, resultFile)
+
+
+def profile(args):
+    import bpy
+
+    ensureAddonRegistered()
+    prop = bpy.context.scene.rigifyToGRTProperty
+    if args.action:
+        prop.profileAction = bpy.data.actions[args.action]
+    prop.profileFrameStep = args.frame_step
+
+    bpy.ops.object.profile_rig_playback()
+    results = bpy.types.OBJECT_OT_profile_rig_playback.lastResults
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outputFile:
+            json.dump(results, outputFile, indent=4)
+
+
+def validate(args):
+    import bpy
+
+    ensureAddonRegistered()
+    prop = bpy.context.scene.rigifyToGRTProperty
+    if args.action:
+        prop.validateAction = bpy.data.actions[args.action]
+    prop.validateAllActions = args.all_actions
+    prop.validateFrameStep = args.frame_step
+    if args.position_tolerance is not None:
+        prop.validatePositionTolerance = args.position_tolerance
+    if args.rotation_tolerance is not None:
+        prop.validateRotationTolerance = args.rotation_tolerance
+    if args.scale_tolerance is not None:
+        prop.validateScaleTolerance = args.scale_tolerance
+
+    bpy.ops.object.validate_grt_deform_rig()
+    results = bpy.types.OBJECT_OT_validate_grt_deform_rig.lastResults
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outputFile:
+            json.dump(results, outputFile, indent=4)
+    print(f'{"Passed" if results["passed"] else "Failed"}: {len(results["failed_bones"])} bones over tolerance')
+    return 0 if results["passed"] else 1
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless Unreal Rigify To GRT tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generateParser = subparsers.add_parser("generate", help="Generate GRT rigs for every entry in a manifest.")
+    generateParser.add_argument("manifest", help="JSON manifest of .blend files and metarig names.")
+    generateParser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    generateParser.add_argument("--report", default="generate_report.json", help="Path of the JSON report.")
+    generateParser.add_argument("--output-dir", help="Save results here instead of overwriting the source files.")
+    generateParser.add_argument("--blender", help="Blender executable used for the workers.")
+    generateParser.add_argument("--timeout", type=float, default=None, help="Per-file timeout in seconds.")
+
+    workerParser = subparsers.add_parser("generate-worker", help=argparse.SUPPRESS)
+    workerParser.add_argument("--metarig", action="append", required=True)
+    workerParser.add_argument("--addon-rig")
+    workerParser.add_argument("--output", required=True)
+    workerParser.add_argument("--result", required=True)
+
+    exportParser = subparsers.add_parser("export", help="Export the GRT rig and its actions to FBX, skipping unchanged files.")
+    exportParser.add_argument("blend", help=".blend file with a generated GRT rig.")
+    exportParser.add_argument("--output-dir", required=True, help="Folder for the FBX files and export_manifest.json.")
+    exportParser.add_argument("--rig", help="Deform rig to export, defaults to the GRT target armature.")
+    exportParser.add_argument("--force", action="store_true", help="Export every file even if unchanged.")
+    exportParser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    exportParser.add_argument("--blender", help="Blender executable used for the workers.")
+    exportParser.add_argument("--timeout", type=float, default=None, help="Per-worker timeout in seconds.")
+
+    exportPlanParser = subparsers.add_parser("export-plan", help=argparse.SUPPRESS)
+    exportPlanParser.add_argument("--output-dir", required=True)
+    exportPlanParser.add_argument("--rig")
+    exportPlanParser.add_argument("--force", action="store_true")
+    exportPlanParser.add_argument("--result", required=True)
+
+    exportWorkerParser = subparsers.add_parser("export-worker", help=argparse.SUPPRESS)
+    exportWorkerParser.add_argument("--output-dir", required=True)
+    exportWorkerParser.add_argument("--job", required=True)
+    exportWorkerParser.add_argument("--result", required=True)
+
+    validateParser = subparsers.add_parser("validate", help="Check the generated deform rig follows the control rig.")
+    validateParser.add_argument("--action", help="Action to play on the control rig, defaults to the scene frame range.")
+    validateParser.add_argument("--all-actions", action="store_true", help="Validate every control rig action.")
+    validateParser.add_argument("--frame-step", type=int, default=1)
+    validateParser.add_argument("--position-tolerance", type=float)
+    validateParser.add_argument("--rotation-tolerance", type=float, help="In degrees.")
+    validateParser.add_argument("--scale-tolerance", type=float)
+    validateParser.add_argument("--output", help="JSON file for the results.")
+
+    profileParser = subparsers.add_parser("profile", help="Profile playback of the generated rig in the open file.")
+    profileParser.add_argument("--action", help="Action to play on the control rig, defaults to the scene frame range.")
+    profileParser.add_argument("--frame-step", type=int, default=1)
+    profileParser.add_argument("--output", help="JSON file for the results.")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        return generate(args)
+    elif args.command == "generate-worker":
+        return generateWorker(args)
+    elif args.command == "export":
+        return export(args)
+    elif args.command == "export-plan":
+        return exportPlanWorker(args)
+    elif args.command == "export-worker":
+        return exportWorker(args)
+    elif args.command == "validate":
+        return validate(args)
+    elif args.command == "profile":
+        return profile(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(getScriptArgs()))
@@ -0,0 +1,50 @@
+"""
+Reading and writing of export_manifest.json, the record of which FBX files of an export are up to date. Shared by the
+add-on's export operator and cli.py export, so it has no bpy dependency.
+"""
+
+import json
+import os
+import time
+
+EXPORT_MANIFEST_NAME = "export_manifest.json"
+
+
+def readExportManifest(directory):
+    manifestPath = os.path.join(directory, EXPORT_MANIFEST_NAME)
+    if not os.path.exists(manifestPath):
+        return {}
+    with open(manifestPath, "r", encoding="utf-8") as manifestFile:
+        return json.load(manifestFile)
+
+
+# Merges export results into the manifest. Unchanged files keep their previous record,
+# failed files are written without a hash so the next export retries them.
+def writeExportManifest(directory, plan, results):
+    previousFiles = readExportManifest(directory).get("files", {})
+    files = {}
+    for fileName, entry in plan["files"].items():
+        record = {"kind": entry["kind"], "name": entry["name"]}
+        if fileName in results:
+            result = results[fileName]
+            record["seconds"] = result["seconds"]
+            if result["error"]:
+                record.update(status="failed", error=result["error"])
+            else:
+                record.update(status="exported", hash=entry["hash"])
+        elif not entry["changed"]:
+            record.update(previousFiles.get(fileName, {}), status="unchanged")
+        else:
+            record.update(status="failed", error="Not exported.")
+        files[fileName] = record
+
+    manifest = {
+        "rig": plan["rig"],
+        "rig_fingerprint": plan["rig_fingerprint"],
+        "written_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "files": files,
+    }
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, EXPORT_MANIFEST_NAME), "w", encoding="utf-8") as manifestFile:
+        json.dump(manifest, manifestFile, indent=4)
+    return manifest